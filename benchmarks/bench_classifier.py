@@ -0,0 +1,99 @@
+"""Benchmark the classification of the completed torrents by release name.
+
+Usage:
+    python -m benchmarks.bench_classifier --repeat 200 --min-rate 50000
+
+Classifies the release names of `release_names.tsv` with the TV shows of
+the corpus known, as if they were in the Kodi library. Reports the
+throughput and the agreement with the expected classification, and exits
+with an error when the throughput or the accuracy is below its budget.
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List, Tuple
+
+from src.classifier import MediaClassifier, parse_release_name
+
+CORPUS = os.path.join(os.path.dirname(__file__), "release_names.tsv")
+
+
+def load_corpus(path: str) -> List[Tuple[str, str]]:
+    """Return the expected kinds and the release names of the corpus."""
+    corpus = []
+    with open(path, encoding="utf-8") as lines:
+        for line in lines:
+            if line.strip() and not line.startswith("#"):
+                expected, name = line.rstrip("\n").split("\t")
+                corpus.append((expected, name))
+    return corpus
+
+
+def main() -> int:
+    """Parse the arguments, run the benchmark and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument(
+        "--shows",
+        type=int,
+        default=1000,
+        help="synthetic TV shows added to the known ones",
+    )
+    parser.add_argument("--min-rate", type=float, help="names per second")
+    parser.add_argument("--min-accuracy", type=float, default=0.95)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    shows = [
+        parse_release_name(name).title
+        for expected, name in corpus
+        if expected == "tv_shows"
+    ]
+    shows.extend(f"Synthetic Show {index:05d}" for index in range(args.shows))
+    started = time.perf_counter()
+    classifier = MediaClassifier(shows)
+    setup = time.perf_counter() - started
+
+    names = [name for _expected, name in corpus]
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for name in names:
+            classifier.classify(name)
+    elapsed = time.perf_counter() - started
+    rate = len(names) * args.repeat / elapsed
+
+    out = sys.stdout
+    correct = 0
+    for expected, name in corpus:
+        classification = classifier.classify(name)
+        kind = classification.kind if classification else "-"
+        correct += kind == expected
+        if args.verbose or kind != expected:
+            out.write(f"{expected:>9} {kind:>9}  {name}  {classification}\n")
+    accuracy = correct / len(corpus)
+    out.write(
+        f"{len(corpus)} names, {len(shows)} known shows "
+        f"(index built in {setup * 1000:.1f}ms)\n"
+        f"classify: {rate:,.0f} names/s, "
+        f"{elapsed / (len(names) * args.repeat) * 1e6:.1f}us per name\n"
+        f"accuracy: {accuracy:.1%}\n",
+    )
+
+    failed = False
+    if args.min_rate is not None and rate < args.min_rate:
+        out.write(f"REGRESSION: {rate:,.0f} names/s < {args.min_rate:,.0f}\n")
+        failed = True
+    if accuracy < args.min_accuracy:
+        out.write(
+            f"REGRESSION: accuracy {accuracy:.1%} < {args.min_accuracy:.1%}\n",
+        )
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
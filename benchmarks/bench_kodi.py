@@ -0,0 +1,183 @@
+"""Benchmark the Kodi client and the listing rendering against a fake Kodi.
+
+Usage:
+    python -m benchmarks.bench_kodi --movies 10000 --shows 1000 --seasons 20
+
+Reports throughput, p50/p99 latency, peak and retained Python memory of every
+scenario, and exits with an error when a `--max-p99` budget is exceeded.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.fake_kodi import FakeKodi, SyntheticLibrary
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Return the q-th percentile of a list of values."""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[
+        min(98, max(0, round(q * 100) - 1))
+    ]
+
+
+async def measure(
+    operation: Callable[[], Awaitable[object]],
+    iterations: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    """Run an operation and measure its latency, throughput and memory.
+
+    Besides the peak memory of a run, the memory still held by the result
+    of the operation (e.g. the parsed library) is reported as retained.
+    """
+    tracemalloc.start()
+    baseline, _peak = tracemalloc.get_traced_memory()
+    result = await operation()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    latencies: List[float] = []
+
+    async def worker(count: int) -> None:
+        for _ in range(count):
+            start = time.perf_counter()
+            await operation()
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    share, rest = divmod(iterations, concurrency)
+    await asyncio.gather(
+        *(worker(share + (index < rest)) for index in range(concurrency)),
+    )
+    elapsed = time.perf_counter() - started
+    return {
+        "ops": iterations / elapsed,
+        "p50": percentile(latencies, 0.5) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "peak": (peak - baseline) / 1024 / 1024,
+        "retained": (current - baseline) / 1024 / 1024,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    """Start the fake Kodi and run every scenario against it."""
+    library = SyntheticLibrary(args.movies, args.shows, args.seasons)
+    fake = FakeKodi(library, args.latency / 1000, args.failure_rate)
+    port = await fake.start()
+
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "benchmark")
+    os.environ["KODI_IP"] = "127.0.0.1"
+    os.environ["KODI_PORT"] = str(port)
+    os.environ["KODI_TCP_PORT"] = "9"
+    os.environ["KODI_SCAN_DEBOUNCE"] = "0"
+    # A fresh database, so no library snapshot of a previous run is served
+    os.environ["TELEGRAM_BOT_DB"] = os.path.join(
+        tempfile.mkdtemp(),
+        "bench.db",
+    )
+
+    from src.config import Config  # noqa: PLC0415
+    from src.handlers import Handlers  # noqa: PLC0415
+
+    config = Config()
+    config.logger.setLevel(logging.WARNING)
+    handlers = Handlers(config)
+    kodi = handlers.kodi_client
+
+    async def render_cached_page() -> None:
+        if handlers.library.page_version("movie") is None:
+            await handlers.library.get_movies()
+        await handlers._render_page("movies", 1)
+
+    async def render_uncached_page() -> None:
+        handlers.rendered.clear()
+        await render_cached_page()
+
+    scenarios = {
+        "get_movies": kodi.get_movies,
+        "get_movies_page": lambda: kodi.get_movies_page(0, 25),
+        "get_tv_shows": kodi.get_tv_shows,
+        "get_tv_shows_page": lambda: kodi.get_tv_shows_page(0, 10),
+        "refresh_library": kodi.refresh_library,
+        "render_movies_page": render_cached_page,
+        "render_movies_page_uncached": render_uncached_page,
+        "render_tv_shows_page": lambda: handlers._render_page("tvshows", 1),
+    }
+    results = {}
+    try:
+        for name, operation in scenarios.items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = await measure(
+                operation,
+                args.iterations,
+                args.concurrency,
+            )
+    finally:
+        await handlers.kodi_notifications.stop()
+        await kodi.close()
+        await fake.stop()
+    results["_requests"] = {"count": fake.requests}
+    return results
+
+
+def main() -> int:
+    """Parse the arguments, run the benchmark and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--movies", type=int, default=1000)
+    parser.add_argument("--shows", type=int, default=1000)
+    parser.add_argument("--seasons", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0, help="ms")
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--only", nargs="*", help="scenarios to run")
+    parser.add_argument(
+        "--max-p99",
+        action="append",
+        default=[],
+        metavar="SCENARIO=MS",
+        help="fail if the p99 latency of a scenario exceeds the budget",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    requests = results.pop("_requests")["count"]
+    out = sys.stdout
+    out.write(
+        f"{'scenario':<28}{'ops/s':>10}{'p50 ms':>10}"
+        f"{'p99 ms':>10}{'peak MB':>10}{'kept MB':>10}\n",
+    )
+    for name, result in results.items():
+        out.write(
+            f"{name:<28}{result['ops']:>10.1f}{result['p50']:>10.2f}"
+            f"{result['p99']:>10.2f}{result['peak']:>10.2f}"
+            f"{result['retained']:>10.2f}\n",
+        )
+    out.write(f"Kodi requests served: {requests}\n")
+
+    failed = False
+    for budget in args.max_p99:
+        name, _sep, limit = budget.partition("=")
+        if name in results and results[name]["p99"] > float(limit):
+            out.write(
+                f"REGRESSION: {name} p99 {results[name]['p99']:.2f}ms "
+                f"> {limit}ms\n",
+            )
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
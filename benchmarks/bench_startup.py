@@ -0,0 +1,131 @@
+"""Benchmark the cold start of the bot and of the torrent hook.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 5 --max-import bot=400
+
+Every scenario runs in a fresh interpreter with `-X importtime`.
+Reports the wall time, the total import time and the slowest top-level
+imports, and exits with an error when a `--max-import` budget is exceeded.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+SCENARIOS = {
+    "bot": (
+        "from main import build_application\n"
+        "from src.config import Config\n"
+        "build_application(Config())\n"
+    ),
+    "hook": (
+        "import runpy\n"
+        "runpy.run_path('on-torrent-complete.py', run_name='hook')\n"
+    ),
+}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, float]]:
+    """Return the top-level imports of a `-X importtime` report, in ms."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _self, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit() or name[1:].startswith(" "):
+            continue
+        imports.append((name.strip(), int(cumulative) / 1000))
+    return imports
+
+
+def run_scenario(code: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """Run a scenario in a fresh interpreter.
+
+    Returns:
+        The wall time in ms, and the top-level imports with their time.
+    """
+    env = {**os.environ, "TELEGRAM_BOT_TOKEN": "0:benchmark"}
+    started = time.perf_counter()
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    return elapsed, parse_importtime(process.stderr)
+
+
+def measure(code: str, runs: int) -> Dict[str, object]:
+    """Run a scenario several times and keep the median timings."""
+    run_scenario(code)
+    walls = []
+    totals = []
+    modules = defaultdict(list)
+    for _ in range(runs):
+        wall, imports = run_scenario(code)
+        walls.append(wall)
+        totals.append(sum(elapsed for _name, elapsed in imports))
+        for name, elapsed in imports:
+            modules[name].append(elapsed)
+    return {
+        "wall": statistics.median(walls),
+        "imports": statistics.median(totals),
+        "modules": sorted(
+            (
+                (statistics.median(elapsed), name)
+                for name, elapsed in modules.items()
+            ),
+            reverse=True,
+        ),
+    }
+
+
+def main() -> int:
+    """Parse the arguments, run the benchmark and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="scenarios to run")
+    parser.add_argument(
+        "--max-import",
+        action="append",
+        default=[],
+        metavar="SCENARIO=MS",
+        help="fail if the import time of a scenario exceeds the budget",
+    )
+    args = parser.parse_args()
+
+    out = sys.stdout
+    results = {}
+    for name, code in SCENARIOS.items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = result = measure(code, args.runs)
+        out.write(
+            f"{name}: wall {result['wall']:.1f}ms, "
+            f"imports {result['imports']:.1f}ms\n",
+        )
+        for elapsed, module in result["modules"][: args.top]:
+            out.write(f"  {module:<30}{elapsed:>10.1f}ms\n")
+
+    failed = False
+    for budget in args.max_import:
+        name, _sep, limit = budget.partition("=")
+        if name in results and results[name]["imports"] > float(limit):
+            out.write(
+                f"REGRESSION: {name} imports {results[name]['imports']:.1f}ms "
+                f"> {limit}ms\n",
+            )
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
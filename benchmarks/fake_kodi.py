@@ -0,0 +1,173 @@
+"""Local stand-in for the Kodi JSON-RPC server, for benchmarks."""
+
+import asyncio
+import json
+import random
+from typing import List, Optional
+
+DROP_RATIO = 0.5
+
+
+class SyntheticLibrary:
+    """Synthetic Kodi library of movies and TV shows with seasons."""
+
+    def __init__(self, movies: int = 1000, shows: int = 100, seasons: int = 5):
+        """Generate `movies` movies and `shows` shows of `seasons` seasons."""
+        self.movies = [
+            {
+                "movieid": index + 1,
+                "label": f"Movie {index:06d}",
+                "title": f"Movie {index:06d}",
+                "year": 1950 + index % 75,
+            }
+            for index in range(movies)
+        ]
+        self.tvshows = [
+            {
+                "tvshowid": index + 1,
+                "label": f"Show {index:05d}",
+                "title": f"Show {index:05d}",
+                "year": 1990 + index % 35,
+            }
+            for index in range(shows)
+        ]
+        self.seasons = [
+            {
+                "seasonid": show * seasons + season + 1,
+                "label": f"Season {season + 1}",
+                "tvshowid": show + 1,
+                "season": season + 1,
+                "episode": 10,
+            }
+            for show in range(shows)
+            for season in range(seasons)
+        ]
+
+
+class FakeKodi:
+    """Kodi JSON-RPC HTTP server over a synthetic library.
+
+    Every request can be delayed by `latency` seconds, and fail with
+    probability `failure_rate`, half of the times with an HTTP 500
+    and the other half by dropping the connection.
+    """
+
+    def __init__(
+        self,
+        library: SyntheticLibrary,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        """Initialize the FakeKodi class serving the given library."""
+        self.library = library
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)  # noqa: S311
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.port: Optional[int] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving and return the listening port."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Serve the keep-alive HTTP requests of a connection."""
+        try:
+            while await reader.readline():
+                length = 0
+                while (header := await reader.readline()).strip():
+                    name, _sep, value = header.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                body = await reader.readexactly(length)
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if self.random.random() < self.failure_rate:
+                    if self.random.random() < DROP_RATIO:
+                        return
+                    self._respond(writer, "500 Internal Server Error", b"")
+                else:
+                    payload = self.dispatch(json.loads(body))
+                    self._respond(
+                        writer,
+                        "200 OK",
+                        json.dumps(payload, separators=(",", ":")).encode(),
+                    )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: str, body: bytes):
+        """Write an HTTP response."""
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body,
+        )
+
+    def dispatch(self, request):
+        """Answer a JSON-RPC request or batch."""
+        if isinstance(request, list):
+            return [self.dispatch(item) for item in request]
+        method = request.get("method")
+        params = request.get("params", {})
+        if method == "VideoLibrary.GetMovies":
+            result = self._page("movies", self.library.movies, params)
+        elif method == "VideoLibrary.GetTVShows":
+            result = self._page("tvshows", self.library.tvshows, params)
+        elif method == "VideoLibrary.GetSeasons":
+            seasons = self.library.seasons
+            if "tvshowid" in params:
+                seasons = [
+                    season
+                    for season in seasons
+                    if season["tvshowid"] == params["tvshowid"]
+                ]
+            result = self._page("seasons", seasons, params)
+        elif method == "VideoLibrary.GetEpisodes":
+            total = sum(season["episode"] for season in self.library.seasons)
+            result = {"episodes": [], "limits": {"total": total}}
+        elif method == "VideoLibrary.GetMovieDetails":
+            index = params.get("movieid", 0) - 1
+            result = {"moviedetails": self.library.movies[index]}
+        elif method == "JSONRPC.Ping":
+            result = "pong"
+        else:
+            result = "OK"
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    @staticmethod
+    def _page(key: str, items: List[dict], params: dict) -> dict:
+        """Apply the `limits` of a request to a list of items."""
+        limits = params.get("limits", {})
+        start = limits.get("start", 0)
+        end = limits.get("end", len(items))
+        page = items[start:end]
+        return {
+            key: page,
+            "limits": {
+                "start": start,
+                "end": start + len(page),
+                "total": len(items),
+            },
+        }
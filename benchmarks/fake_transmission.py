@@ -0,0 +1,133 @@
+"""Local stand-in for the Transmission RPC server, for benchmarks and tests."""
+
+import asyncio
+import json
+import secrets
+from typing import Dict, List, Optional
+
+SESSION_ID_HEADER = "X-Transmission-Session-Id"
+
+
+class FakeTransmission:
+    """Transmission RPC HTTP server over a set of torrents.
+
+    Requests without the current session id are answered 409 Conflict
+    with the id to use, as Transmission does to protect against CSRF.
+    The `torrent-get` and `torrent-remove` methods act on `torrents`,
+    and every request can be made to fail with an RPC `failure` result,
+    an HTTP `status`, or by dropping the connection.
+    """
+
+    def __init__(self, torrents: Optional[List[dict]] = None):
+        """Initialize the FakeTransmission class with the given torrents."""
+        self.torrents: Dict[int, dict] = {
+            torrent["id"]: torrent for torrent in torrents or []
+        }
+        self.session_id = secrets.token_hex(8)
+        self.requests: List[dict] = []
+        self.conflicts = 0
+        self.failure: Optional[str] = None
+        self.status: Optional[str] = None
+        self.drop = False
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.port: Optional[int] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving and return the listening port."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def rotate_session(self) -> None:
+        """Change the session id, as a restarted daemon does."""
+        self.session_id = secrets.token_hex(8)
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Serve the keep-alive HTTP requests of a connection."""
+        try:
+            while await reader.readline():
+                headers = {}
+                while (header := await reader.readline()).strip():
+                    name, _sep, value = header.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(
+                    int(headers.get("content-length", 0)),
+                )
+                if self.drop:
+                    return
+                if self.status is not None:
+                    self._respond(writer, self.status, b"")
+                elif headers.get(SESSION_ID_HEADER.lower()) != self.session_id:
+                    self.conflicts += 1
+                    self._respond(
+                        writer,
+                        "409 Conflict",
+                        b"",
+                        {SESSION_ID_HEADER: self.session_id},
+                    )
+                else:
+                    request = json.loads(body)
+                    self.requests.append(request)
+                    self._respond(
+                        writer,
+                        "200 OK",
+                        json.dumps(self.dispatch(request)).encode(),
+                    )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _respond(
+        writer: asyncio.StreamWriter,
+        status: str,
+        body: bytes,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        """Write an HTTP response."""
+        extra = "".join(
+            f"{name}: {value}\r\n" for name, value in (headers or {}).items()
+        )
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            "Content-Type: application/json\r\n"
+            f"{extra}"
+            f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body,
+        )
+
+    def dispatch(self, request: dict) -> dict:
+        """Answer an RPC request."""
+        method = request.get("method")
+        if self.failure is not None:
+            return {"result": self.failure, "arguments": {}}
+        arguments = request.get("arguments", {})
+        ids = arguments.get("ids", list(self.torrents))
+        if method == "session-get":
+            return {"result": "success", "arguments": {"version": "4.0.6"}}
+        if method == "torrent-get":
+            fields = arguments.get("fields", [])
+            torrents = [
+                {field: torrent.get(field) for field in fields}
+                for torrent_id, torrent in self.torrents.items()
+                if torrent_id in ids
+            ]
+            return {"result": "success", "arguments": {"torrents": torrents}}
+        if method == "torrent-remove":
+            for torrent_id in ids:
+                self.torrents.pop(torrent_id, None)
+            return {"result": "success", "arguments": {}}
+        return {"result": "method name not recognized", "arguments": {}}
@@ -1,51 +1,127 @@
 """Main entry point for the Telegram bot application."""
 
 import sys
+from typing import Optional
 
 from telegram import Update
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
     CallbackQueryHandler,
     CommandHandler,
 )
+from telegram.request import BaseRequest
 
 from src.callbacks import Callbacks
 from src.config import Config
 from src.handlers import Handlers
 
-# Load configuration and initialize components
-config = Config()
-callbacks = Callbacks(config)
-handlers = Handlers(config)
-
-# Build the application with the token and callbacks
-config.logger.debug("Starting bot with post init and post stop callbacks")
-app = (
-    ApplicationBuilder()
-    .token(config.token)
-    .post_init(callbacks.post_init)
-    .post_stop(callbacks.post_stop)
-    .build()
-)
+# Only receive the update types handled by the registered handlers
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
 
-# Register handlers
-config.logger.debug(
-    "Loading following command handlers: %s",
-    handlers.name_list(),
-)
-app.add_handler(CommandHandler("hello", handlers.hello))
-app.add_handler(CommandHandler("reboot", handlers.reboot))
-app.add_handler(CommandHandler("movies", handlers.get_movies))
-app.add_handler(CommandHandler("tvshows", handlers.get_tv_shows))
-app.add_handler(CommandHandler("refresh", handlers.refresh_kodi_library))
-app.add_handler(CallbackQueryHandler(handlers.on_torrent_complete_handler))
-
-app.add_error_handler(handlers.error_handler)
-
-# Start the bot
-try:
-    config.logger.info("Bot is polling for messages")
-    app.run_polling(drop_pending_updates=True, allowed_updates=Update.ALL_TYPES)
-except KeyboardInterrupt:
-    config.logger.info("Received keyboard interrupt, shutting down gracefully")
-    sys.exit(0)
+
+def build_application(
+    config: Config,
+    request: Optional[BaseRequest] = None,
+) -> Application:
+    """Build the application with its handlers and callbacks.
+
+    Args:
+        config: The configuration of the bot.
+        request: Optional requests of the bot to the Bot API,
+            e.g. a fake Telegram to receive webhook updates locally.
+
+    Returns:
+        The application, ready to be run.
+    """
+    handlers = Handlers(config)
+    callbacks = Callbacks(config, handlers)
+
+    # Build the application with the token and callbacks
+    config.logger.debug(
+        "Starting bot with post init, stop and shutdown callbacks",
+    )
+    builder = (
+        ApplicationBuilder()
+        .token(config.token)
+        .concurrent_updates(config.concurrent_updates)
+        .post_init(callbacks.post_init)
+        .post_stop(callbacks.post_stop)
+        .post_shutdown(callbacks.post_shutdown)
+    )
+    if request is not None:
+        builder = builder.request(request).get_updates_request(request)
+    app = builder.build()
+
+    # Register handlers
+    config.logger.debug(
+        "Loading following command handlers: %s",
+        handlers.name_list(),
+    )
+    app.add_handler(CommandHandler("hello", handlers.hello))
+    app.add_handler(CommandHandler("reboot", handlers.reboot))
+    app.add_handler(CommandHandler("movies", handlers.get_movies))
+    app.add_handler(CommandHandler("tvshows", handlers.get_tv_shows))
+    app.add_handler(CommandHandler("search", handlers.search))
+    app.add_handler(CommandHandler("refresh", handlers.refresh_kodi_library))
+    app.add_handler(CommandHandler("stats", handlers.stats))
+    app.add_handler(CommandHandler("status", handlers.status))
+    app.add_handler(
+        CallbackQueryHandler(handlers.on_page_handler, pattern=r"^page\|"),
+    )
+    app.add_handler(
+        CallbackQueryHandler(
+            handlers.on_torrent_complete_handler,
+            pattern=r"^(movies|tv_shows)\|",
+            block=False,
+        ),
+    )
+
+    app.add_error_handler(handlers.error_handler)
+    return app
+
+
+def webhook_options(config: Config) -> dict:
+    """Get the options of the webhook receiver and of its registration."""
+    return {
+        "listen": config.webhook.listen,
+        "port": config.webhook.port,
+        "url_path": config.webhook.path,
+        "webhook_url": (
+            f"{config.webhook.url.rstrip('/')}/{config.webhook.path}"
+        ),
+        "secret_token": config.webhook.secret_token,
+        "drop_pending_updates": True,
+        "allowed_updates": ALLOWED_UPDATES,
+    }
+
+
+def main() -> None:
+    """Load the configuration and run the bot until interrupted."""
+    config = Config()
+    app = build_application(config)
+
+    # Start the bot
+    try:
+        if config.webhook.enabled:
+            config.logger.info(
+                "Bot is listening for webhook updates on %s:%s",
+                config.webhook.listen,
+                config.webhook.port,
+            )
+            app.run_webhook(**webhook_options(config))
+        else:
+            config.logger.info("Bot is polling for messages")
+            app.run_polling(
+                drop_pending_updates=True,
+                allowed_updates=ALLOWED_UPDATES,
+            )
+    except KeyboardInterrupt:
+        config.logger.info(
+            "Received keyboard interrupt, shutting down gracefully",
+        )
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,60 @@
 """Python script to be executed when a torrent download is completed."""
 
 #!/usr/bin/python3
-import asyncio
+import json
 import os
+import socket
 
-from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+DEFAULT_SOCKET_PATH = "/tmp/telegram-bot.sock"  # noqa: S108
 
-from src.config import Config
 
+def forward_to_bot() -> bool:
+    """Forward the torrent completion to the running bot.
 
-def escape_markdown(text: str) -> str:
-    """Escape Telegram Markdown V1 special characters."""
-    escape_chars = r"_*>#[]()~`|{}.!"
-    for char in escape_chars:
-        text = text.replace(char, f"\\{char}")
-    return text
+    Only the standard library is used, so the hook starts fast.
+    The `TR_TORRENT_*` environment variables are sent as a JSON line
+    to the Unix socket of the bot, which sends the notification
+    over its already open connection to Telegram.
+
+    Returns:
+        True if the bot received the torrent completion. Once the message
+        is sent, only an explicit error of the bot falls back to a new
+        instance: a lost or late answer would send it twice.
+    """
+    socket_path = os.getenv("TELEGRAM_BOT_SOCKET", DEFAULT_SOCKET_PATH)
+    message = {
+        name: os.getenv(name)
+        for name in ("TR_TORRENT_ID", "TR_TORRENT_DIR", "TR_TORRENT_NAME")
+    }
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(30)
+            client.connect(socket_path)
+            client.sendall(json.dumps(message).encode() + b"\n")
+            try:
+                return client.makefile("rb").readline().strip() != b"error"
+            except OSError:
+                return True
+    except OSError:
+        return False
 
 
 async def send_choice():
     """Send a Torrent complete notification to the admin chat.
 
-    In case the notification is triggered by a torrent completion,
-    it will include inline keyboard to select the media type (Movie or TV Show)
-    for the completed torrent.
-    The callback data for the buttons has following format:
-    "action|torrent_id|source_path|name"
-    Format is knows also by the bot, allowing it to process the user's choice
-    when the button is pressed.
+    Fallback used when the bot is not listening on its Unix socket:
+    a new bot instance sends the same notification built by the bot,
+    with inline keyboard to select the media type (Movie or TV Show).
 
     In case of missing environment variables,
     it will send a simple notification without buttons.
     """
+    from telegram import Bot  # noqa: PLC0415
+
+    from src.config import Config  # noqa: PLC0415
+    from src.tokens import CallbackTokenStore  # noqa: PLC0415
+    from src.torrents import torrent_complete_message  # noqa: PLC0415
+
     # Load configuration
     config = Config()
 
@@ -44,44 +68,36 @@ async def send_choice():
         t_dir,
         t_name,
     )
-
-    bot = Bot(token=config.token)
     if not all([t_id, t_dir, t_name]):
         config.logger.warning(
-            "Missing torrent environment variables, stopping handler.",
-        )
-        await bot.send_message(
-            chat_id=config.admin_chat_id,
-            text="📥 *Download Finished!*",
-            parse_mode="Markdown",
+            "Missing torrent environment variables, sending simple message.",
         )
-        return
-
-    reply_markup = InlineKeyboardMarkup(
-        [
-            [
-                InlineKeyboardButton(
-                    "🎬 Movie",
-                    callback_data=f"movies|{t_id}|{t_dir}|{t_name}",
-                ),
-            ],
-            [
-                InlineKeyboardButton(
-                    "📺 TV",
-                    callback_data=f"tv_shows|{t_id}|{t_dir}|{t_name}",
-                ),
-            ],
-        ],
-    )
 
+    callback_tokens = CallbackTokenStore(
+        config.db_path,
+        config.callback_token_ttl,
+        config.callback_token_max_entries,
+        config.logger,
+    )
+    text, reply_markup = torrent_complete_message(
+        t_id,
+        t_dir,
+        t_name,
+        callback_tokens,
+    )
+    callback_tokens.close()
+    bot = Bot(token=config.token)
     async with bot:
         await bot.send_message(
             chat_id=config.admin_chat_id,
-            text=f"📥 *Download Finished*\n{escape_markdown(t_name)}",
+            text=text,
             reply_markup=reply_markup,
             parse_mode="Markdown",
         )
 
 
 if __name__ == "__main__":
-    asyncio.run(send_choice())
+    if not forward_to_bot():
+        import asyncio
+
+        asyncio.run(send_choice())
@@ -1,15 +1,17 @@
 """Callbacks for the Telegram bot application."""
 
 from src.config import Config
+from src.handlers import Handlers
 
 
 class Callbacks:
     """Callbacks for the Telegram bot application."""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, handlers: Handlers):
         """Initialize the Callbacks class with the given configuration."""
         self.config = config
         self.logger = config.logger
+        self.handlers = handlers
 
     async def post_init(self, application) -> None:
         """Post-initialization callback for the Telegram bot application.
@@ -19,10 +21,11 @@ class Callbacks:
         It sends a startup notification to the admin chat if configured.
         """
         self.logger.debug("Post-initialization callback triggered")
+        await self.handlers.startup(application)
         if self.config.can_send_notification:
-            await application.bot.send_message(
-                chat_id=self.config.admin_chat_id,
-                text="🤖 Bot is now online and ready to accept messages!",
+            await self.handlers.outbox.send_message(
+                self.config.admin_chat_id,
+                "🤖 Bot is now online and ready to accept messages!",
             )
             self.logger.debug(
                 "Sent startup notification to chat %s",
@@ -30,7 +33,7 @@ class Callbacks:
             )
         self.logger.info("Bot started successfully")
 
-    async def post_stop(self, application) -> None:
+    async def post_stop(self, _application) -> None:
         """Post-stop callback for the Telegram bot application.
 
         Callback method that is called when the bot is stopping
@@ -39,12 +42,21 @@ class Callbacks:
         """
         self.logger.debug("Post-stop callback triggered")
         if self.config.can_send_notification:
-            await application.bot.send_message(
-                chat_id=self.config.admin_chat_id,
-                text="🛑 Bot is shutting down...",
+            await self.handlers.outbox.send_message(
+                self.config.admin_chat_id,
+                "🛑 Bot is shutting down...",
             )
             self.logger.debug(
                 "Sent shutdown notification to chat %s",
                 self.config.admin_chat_id,
             )
         self.logger.info("Bot has been stopped")
+
+    async def post_shutdown(self, application) -> None:
+        """Post-shutdown callback for the Telegram bot application.
+
+        Callback method that is called after the bot is shut down.
+        It releases the resources held by the handlers.
+        """
+        self.logger.debug("Post-shutdown callback triggered")
+        await self.handlers.shutdown(application)
@@ -0,0 +1,229 @@
+"""Classification of the completed torrents from their release name."""
+
+import os
+import re
+from typing import Iterable, Optional
+
+VIDEO_EXTENSIONS = (".mkv", ".mp4", ".avi", ".m4v", ".ts", ".wmv", ".mov")
+
+SEPARATORS = re.compile(r"[._\s]+")
+EPISODE = re.compile(
+    r"\bS(\d{1,2}) ?E(\d{1,3})(?:-?E\d{1,3})*\b|\b(\d{1,2})x(\d{2,3})\b",
+    re.IGNORECASE,
+)
+SEASON = re.compile(
+    r"\b(?:S(\d{1,2})|Season ?(\d{1,2}))\b(?! ?E\d)",
+    re.IGNORECASE,
+)
+YEAR = re.compile(r"[\[(]?\b((?:19|20)\d{2})\b[\])]?")
+RESOLUTION = re.compile(r"\b(480p|576p|720p|1080[pi]|2160p|4K|UHD)\b", re.I)
+CODEC = re.compile(
+    r"\b(x26[45]|h ?26[45]|HEVC|AVC|XviD|DivX|AV1|VP9)\b",
+    re.IGNORECASE,
+)
+SOURCE = re.compile(
+    r"\b(BluRay|Blu-Ray|BDRip|BRRip|WEB-?DL|WEBRip|WEB|HDTV|DVDRip|HDRip|"
+    r"REMUX)\b",
+    re.IGNORECASE,
+)
+TITLE_WORDS = re.compile(r"[^\W_]+")
+
+
+class ReleaseInfo:
+    """Details parsed from the release name of a torrent."""
+
+    __slots__ = (
+        "title",
+        "year",
+        "season",
+        "episode",
+        "resolution",
+        "codec",
+        "source",
+    )
+
+    def __init__(self, title, year=None, season=None, episode=None):
+        """Initialize the ReleaseInfo class.
+
+        Args:
+            title: The title, before the first episode or quality tag.
+            year: The release year, if tagged.
+            season: The season number of an episode or a season pack.
+            episode: The episode number, None for a season pack.
+        """
+        self.title = title
+        self.year = year
+        self.season = season
+        self.episode = episode
+        self.resolution = None
+        self.codec = None
+        self.source = None
+
+    @property
+    def tagged(self) -> bool:
+        """Check if the name has the quality tags of a release."""
+        return bool(self.resolution or self.codec or self.source)
+
+    def __repr__(self):
+        """Return a string representation of the ReleaseInfo instance."""
+        return (
+            f"ReleaseInfo(title={self.title!r}, year={self.year!r}, "
+            f"season={self.season!r}, episode={self.episode!r})"
+        )
+
+
+def parse_release_name(name: str) -> ReleaseInfo:
+    """Parse the title, year, episode and quality tags of a release name."""
+    if name.lower().endswith(VIDEO_EXTENSIONS):
+        name = name.rsplit(".", 1)[0]
+    text = SEPARATORS.sub(" ", name).strip()
+    end = len(text)
+    season = episode = year = None
+
+    if match := EPISODE.search(text):
+        season = int(match.group(1) or match.group(3))
+        episode = int(match.group(2) or match.group(4))
+        end = match.start()
+    elif match := SEASON.search(text):
+        season = int(match.group(1) or match.group(2))
+        end = match.start()
+
+    tags = []
+    for pattern in (RESOLUTION, CODEC, SOURCE):
+        match = pattern.search(text)
+        tags.append(match.group(1) if match else None)
+        if match:
+            end = min(end, match.start())
+
+    # The last year before the tags, so a year in the title is kept.
+    for match in YEAR.finditer(text, 0, end):
+        if match.start() > 0:
+            year = int(match.group(1))
+            end = match.start()
+
+    info = ReleaseInfo(text[:end].strip(" -[("), year, season, episode)
+    info.resolution, info.codec, info.source = tags
+    return info
+
+
+def normalize_title(title: str) -> str:
+    """Return the words of a title in lower case, for comparisons."""
+    return " ".join(TITLE_WORDS.findall(title.casefold()))
+
+
+class Classification:
+    """Media type and location chosen for a completed torrent."""
+
+    __slots__ = ("kind", "show", "season", "release")
+
+    def __init__(self, kind, release, show=None, season=None):
+        """Initialize the Classification class.
+
+        Args:
+            kind: "movies" or "tv_shows", as the inline buttons.
+            release: The details parsed from the release name.
+            show: The title of the TV show.
+            season: The season number, None for a whole season pack.
+        """
+        self.kind = kind
+        self.release = release
+        self.show = show
+        self.season = season
+
+    def __repr__(self):
+        """Return a string representation of the Classification instance."""
+        return (
+            f"Classification(kind={self.kind!r}, show={self.show!r}, "
+            f"season={self.season!r})"
+        )
+
+
+class MediaClassifier:
+    """Tell movies from TV episodes by their release name.
+
+    Names with an episode (S01E02, 1x02) or a season (S01, Season 1) tag
+    are TV shows, filed under the matching show of the Kodi library when
+    there is one. Names with a year and quality tags are movies, unless
+    their title is a known show. Anything else is left to the user.
+    """
+
+    def __init__(self, show_titles: Iterable[str]):
+        """Initialize the MediaClassifier class with the known TV shows."""
+        self.shows = {}
+        for title in show_titles:
+            key = normalize_title(title)
+            self.shows.setdefault(key, title)
+            # "Show (2005)" is usually released as "Show 2005" or "Show"
+            self.shows.setdefault(YEAR.sub("", key).strip(), title)
+
+    def match_show(self, release: ReleaseInfo) -> Optional[str]:
+        """Return the known TV show of a release, if any."""
+        key = normalize_title(release.title)
+        if show := self.shows.get(key):
+            return show
+        if release.year is not None:
+            return self.shows.get(f"{key} {release.year}")
+        return None
+
+    def classify(self, name: str) -> Optional[Classification]:
+        """Classify a release name.
+
+        Returns:
+            The classification, or None if the release is ambiguous.
+        """
+        release = parse_release_name(name)
+        if not release.title:
+            return None
+        show = self.match_show(release)
+        if release.season is not None:
+            season = release.season if release.episode is not None else None
+            return Classification(
+                "tv_shows",
+                release,
+                show or release.title,
+                season,
+            )
+        if show is None and release.year is not None and release.tagged:
+            return Classification("movies", release)
+        return None
+
+
+def media_folder(root: str, classification: Classification) -> str:
+    """Return the folder where a classified torrent is filed.
+
+    Episodes go into the season folder of their show, and season packs
+    into the show folder. Existing folders are reused, even when named
+    differently (e.g. "Season 1" instead of "Season 01").
+    """
+    if classification.kind != "tv_shows":
+        return root
+    show = normalize_title(classification.show)
+    folder = next(
+        (
+            entry
+            for entry in _subfolders(root)
+            if normalize_title(entry) == show
+        ),
+        classification.show.replace(os.sep, " "),
+    )
+    path = os.path.join(root, folder)
+    if classification.season is None:
+        return path
+    season = next(
+        (
+            entry
+            for entry in _subfolders(path)
+            if (match := SEASON.fullmatch(SEPARATORS.sub(" ", entry)))
+            and int(match.group(1) or match.group(2)) == classification.season
+        ),
+        f"Season {classification.season:02d}",
+    )
+    return os.path.join(path, season)
+
+
+def _subfolders(path: str) -> list:
+    """Return the names of the folders in a folder, if it exists."""
+    try:
+        return [entry.name for entry in os.scandir(path) if entry.is_dir()]
+    except OSError:
+        return []
@@ -2,11 +2,8 @@
 
 import logging
 import os
-from typing import Optional
-
-from dotenv import load_dotenv
-
-load_dotenv()
+import secrets
+from typing import Dict, Optional
 
 
 class KodiConfig:
@@ -20,6 +17,26 @@ class KodiConfig:
         self.password: Optional[str] = os.getenv("KODI_PASSWORD")
         self.movies_path: Optional[str] = os.getenv("KODI_MOVIES_PATH")
         self.tv_shows_path: Optional[str] = os.getenv("KODI_TV_SHOWS_PATH")
+        self.movies_source: Optional[str] = os.getenv(
+            "KODI_MOVIES_SOURCE",
+            self.movies_path,
+        )
+        self.tv_shows_source: Optional[str] = os.getenv(
+            "KODI_TV_SHOWS_SOURCE",
+            self.tv_shows_path,
+        )
+        self.timeout: float = float(os.getenv("KODI_TIMEOUT", "5"))
+        self.max_connections: int = int(
+            os.getenv("KODI_MAX_CONNECTIONS", "4"),
+        )
+        self.tcp_port: int = int(os.getenv("KODI_TCP_PORT", "9090"))
+        self.cache_ttl: float = float(os.getenv("KODI_CACHE_TTL", "300"))
+        self.scan_debounce: float = float(
+            os.getenv("KODI_SCAN_DEBOUNCE", "5"),
+        )
+        self.scan_timeout: float = float(
+            os.getenv("KODI_SCAN_TIMEOUT", "900"),
+        )
 
 
 class TransmissionConfig:
@@ -27,15 +44,128 @@ class TransmissionConfig:
 
     def __init__(self):
         """Initialize the TransmissionConfig class by loading environment variables."""  # noqa: E501
+        self.host: str = os.getenv("TRANSMISSION_HOST", "localhost")
+        self.port: int = int(os.getenv("TRANSMISSION_PORT", "9091"))
         self.username: Optional[str] = os.getenv("TRANSMISSION_USERNAME")
         self.password: Optional[str] = os.getenv("TRANSMISSION_PASSWORD")
+        self.timeout: float = float(os.getenv("TRANSMISSION_TIMEOUT", "5"))
+
+
+class TransferConfig:
+    """Configuration class for the transfers of completed torrents."""
+
+    def __init__(self):
+        """Initialize the TransferConfig class by loading environment variables."""  # noqa: E501
+        self.workers: int = int(os.getenv("TRANSFER_WORKERS", "2"))
+        self.chunk_size: int = (
+            int(os.getenv("TRANSFER_CHUNK_SIZE_MB", "8")) * 1024 * 1024
+        )
+        self.progress_interval: float = float(
+            os.getenv("TRANSFER_PROGRESS_INTERVAL", "5"),
+        )
+
+
+class OutboxConfig:
+    """Configuration class for the outgoing messages rate limits."""
+
+    def __init__(self):
+        """Initialize the OutboxConfig class by loading environment variables."""  # noqa: E501
+        self.global_rate: float = float(
+            os.getenv("TELEGRAM_GLOBAL_RATE", "30"),
+        )
+        self.chat_rate: float = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+        self.burst: int = int(os.getenv("TELEGRAM_BURST", "3"))
+        self.max_chats: int = 1000
+
+
+class HealthConfig:
+    """Configuration class for the health tracking of the backends."""
+
+    def __init__(self):
+        """Initialize the HealthConfig class by loading environment variables."""  # noqa: E501
+        self.check_interval: float = float(
+            os.getenv("HEALTH_CHECK_INTERVAL", "30"),
+        )
+        self.failure_threshold: int = int(
+            os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"),
+        )
+        self.reset_timeout: float = float(
+            os.getenv("CIRCUIT_RESET_TIMEOUT", "5"),
+        )
+        self.max_reset_timeout: float = float(
+            os.getenv("CIRCUIT_MAX_RESET_TIMEOUT", "300"),
+        )
+
+
+class SystemConfig:
+    """Configuration class for the sampling of the system status."""
+
+    def __init__(self):
+        """Initialize the SystemConfig class by loading environment variables."""  # noqa: E501
+        self.sample_interval: float = float(
+            os.getenv("STATUS_SAMPLE_INTERVAL", "10"),
+        )
+        self.history: float = 60 * float(
+            os.getenv("STATUS_HISTORY_MINUTES", "60"),
+        )
+        # Alerts with a threshold of 0 are disabled
+        self.alert_cpu: float = float(os.getenv("ALERT_CPU_PERCENT", "90"))
+        self.alert_memory: float = float(
+            os.getenv("ALERT_MEMORY_PERCENT", "90"),
+        )
+        self.alert_temperature: float = float(
+            os.getenv("ALERT_TEMPERATURE", "80"),
+        )
+        self.alert_disk_free: float = float(
+            os.getenv("ALERT_DISK_FREE_GB", "5"),
+        )
+
+
+class LogConfig:
+    """Configuration class for the logs."""
+
+    def __init__(self):
+        """Initialize the LogConfig class by loading environment variables."""
+        self.format: str = os.getenv("LOG_FORMAT", "text").lower()
+        # e.g. "telegram_bot.kodi=WARNING,httpx=INFO"
+        self.levels: Dict[str, str] = dict(
+            entry.strip().split("=", 1)
+            for entry in os.getenv("LOG_LEVELS", "").split(",")
+            if "=" in entry
+        )
+
+
+class WebhookConfig:
+    """Configuration class for receiving updates through a webhook."""
+
+    def __init__(self):
+        """Initialize the WebhookConfig class by loading environment variables."""  # noqa: E501
+        self.url: Optional[str] = os.getenv("TELEGRAM_WEBHOOK_URL")
+        self.listen: str = os.getenv("TELEGRAM_WEBHOOK_LISTEN", "127.0.0.1")
+        self.port: int = int(os.getenv("TELEGRAM_WEBHOOK_PORT", "8443"))
+        self.path: str = os.getenv("TELEGRAM_WEBHOOK_PATH", "telegram")
+        self.secret_token: str = os.getenv(
+            "TELEGRAM_WEBHOOK_SECRET",
+            secrets.token_urlsafe(32),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Determine if updates are received through the webhook."""
+        return bool(self.url)
 
 
 class Config:
     """Configuration class for the Telegram bot application."""
 
     def __init__(self):
-        """Initialize the Config class by loading environment variables."""
+        """Initialize the Config class by loading environment variables.
+
+        The `.env` file, if any, is loaded first.
+        """
+        from dotenv import load_dotenv  # noqa: PLC0415
+
+        load_dotenv()
         self.token: str = os.getenv("TELEGRAM_BOT_TOKEN")
         if not self.token:
             raise ValueError(
@@ -45,9 +175,54 @@ class Config:
         self.debug: bool = (
             os.getenv("TELEGRAM_BOT_DEBUG", "False").lower() == "true"
         )
+        self.socket_path: str = os.getenv(
+            "TELEGRAM_BOT_SOCKET",
+            "/tmp/telegram-bot.sock",  # noqa: S108
+        )
+        self.db_path: str = os.getenv(
+            "TELEGRAM_BOT_DB",
+            os.path.join(
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                "telegram-bot.db",
+            ),
+        )
+        # Apart from the state, so saving it never locks the callback tokens
+        self.snapshot_path: str = os.getenv(
+            "TELEGRAM_LIBRARY_SNAPSHOT",
+            f"{os.path.splitext(self.db_path)[0]}-library.db",
+        )
+        self.callback_token_ttl: float = float(
+            os.getenv("TELEGRAM_CALLBACK_TOKEN_TTL", str(7 * 24 * 3600)),
+        )
+        self.callback_token_max_entries: int = int(
+            os.getenv("TELEGRAM_CALLBACK_TOKEN_MAX_ENTRIES", "1000"),
+        )
+        self.digest_window: float = float(
+            os.getenv("TORRENT_DIGEST_WINDOW", "10"),
+        )
+        self.auto_classify: bool = (
+            os.getenv("TORRENT_AUTO_CLASSIFY", "True").lower() == "true"
+        )
+        self.render_cache_bytes: int = int(
+            float(os.getenv("TELEGRAM_RENDER_CACHE_MB", "2")) * 1024 * 1024,
+        )
+        self.concurrent_updates: int = int(
+            os.getenv("TELEGRAM_CONCURRENT_UPDATES", "16"),
+        )
+        self.metrics_listen: str = os.getenv("METRICS_LISTEN", "127.0.0.1")
+        metrics_port = os.getenv("METRICS_PORT")
+        self.metrics_port: Optional[int] = (
+            int(metrics_port) if metrics_port else None
+        )
         self._logger: Optional[logging.Logger] = None
         self.kodi = KodiConfig()
         self.transmission = TransmissionConfig()
+        self.transfer = TransferConfig()
+        self.outbox = OutboxConfig()
+        self.webhook = WebhookConfig()
+        self.health = HealthConfig()
+        self.log = LogConfig()
+        self.system = SystemConfig()
 
     @property
     def can_send_notification(self) -> bool:
@@ -58,12 +233,12 @@ class Config:
     def logger(self) -> logging.Logger:
         """Get the logger instance, creating it if it doesn't exist."""
         if self._logger is None:
-            self._logger = logging.getLogger("telegram_bot")
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            from src.logs import configure_logging  # noqa: PLC0415
+
+            self._logger = configure_logging(
+                "telegram_bot",
+                logging.DEBUG if self.debug else logging.INFO,
+                self.log.format,
+                self.log.levels,
             )
-            handler.setFormatter(formatter)
-            self._logger.addHandler(handler)
-            self._logger.setLevel(logging.DEBUG if self.debug else logging.INFO)
         return self._logger
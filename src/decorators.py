@@ -6,6 +6,8 @@ from typing import Callable
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from src.metrics import metrics
+
 
 def admin_only(action_name: str = "action") -> Callable:
     """Decorator to restrict handler access to admin users only."""
@@ -18,9 +20,15 @@ def admin_only(action_name: str = "action") -> Callable:
             context: ContextTypes.DEFAULT_TYPE,
         ) -> None:
             if str(update.effective_user.id) != self.config.admin_chat_id:
-                await update.message.reply_text(
-                    "⛔ Unauthorized request.",
-                )
+                if update.callback_query is not None:
+                    await update.callback_query.answer(
+                        "⛔ Unauthorized request.",
+                    )
+                else:
+                    await self.outbox.reply(
+                        update,
+                        "⛔ Unauthorized request.",
+                    )
                 self.logger.warning(
                     "Unauthorized %s attempt by %s",
                     action_name,
@@ -32,3 +40,21 @@ def admin_only(action_name: str = "action") -> Callable:
         return wrapper
 
     return decorator
+
+
+def timed(handler_name: str) -> Callable:
+    """Decorator to record the latency, in flight and errors of a handler."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(
+            self,
+            update: Update,
+            context: ContextTypes.DEFAULT_TYPE,
+        ) -> None:
+            with metrics.timer("handler", handler=handler_name):
+                return await func(self, update, context)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,181 @@
+"""Aggregation of the torrent completions received close together."""
+
+import asyncio
+import json
+import sqlite3
+import threading
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class PendingCompletions:
+    """SQLite backed list of the torrent completions not notified yet.
+
+    A completion is saved before the hook is answered, and forgotten
+    once its notification is sent, so the completions of a window
+    survive a crash or a restart of the bot.
+    The connection is shared by the worker threads running the calls.
+    """
+
+    def __init__(self, path: str, logger):
+        """Initialize the PendingCompletions class.
+
+        Args:
+            path: Path of the SQLite database file.
+            logger: Logger instance.
+        """
+        self.path = path
+        self.logger = logger
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Get the database connection, creating the table if needed."""
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                self.path,
+                timeout=5,
+                check_same_thread=False,
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS pending_completions ("
+                "completion_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "variables TEXT NOT NULL)",
+            )
+            self._connection.commit()
+        return self._connection
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def save(self, variables: Dict[str, Optional[str]]) -> int:
+        """Save a completion and return its id."""
+        with self._lock, self.connection:
+            return self.connection.execute(
+                "INSERT INTO pending_completions (variables) VALUES (?)",
+                (json.dumps(variables),),
+            ).lastrowid
+
+    def load(self) -> List[Tuple[int, Dict[str, Optional[str]]]]:
+        """Load the saved completions, in the order they were received."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT completion_id, variables FROM pending_completions "
+                "ORDER BY completion_id",
+            ).fetchall()
+        return [(row_id, json.loads(variables)) for row_id, variables in rows]
+
+    def delete(self, ids: Iterable[int]) -> None:
+        """Forget the completions whose notification was sent."""
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "DELETE FROM pending_completions WHERE completion_id = ?",
+                ((row_id,) for row_id in ids),
+            )
+
+
+class CompletionDigest:
+    """Fold the torrent completions of an aggregation window together.
+
+    The first completion opens a window of `window` seconds, and all the
+    completions received meanwhile are sent as a single notification.
+    A full digest is sent right away, without waiting for its window.
+    With a store, adding a completion saves it before returning,
+    so the hook is answered without waiting for the window, and the
+    completions not sent yet are sent again after a restart.
+    """
+
+    MAX_ITEMS = 20
+
+    def __init__(
+        self,
+        window: float,
+        send: Callable[[List[Dict[str, Optional[str]]]], Awaitable[None]],
+        logger,
+        store: Optional[PendingCompletions] = None,
+    ):
+        """Initialize the CompletionDigest class.
+
+        Args:
+            window: Seconds to wait for more completions.
+            send: Coroutine called with the completions of a window.
+            logger: Logger instance.
+            store: Optional store of the completions not sent yet.
+        """
+        self.window = window
+        self.send = send
+        self.logger = logger
+        self.store = store
+        self._pending: List[Tuple[Optional[int], dict]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: set = set()
+
+    async def add(self, variables: Dict[str, Optional[str]]) -> None:
+        """Save a torrent completion, to be sent with its window."""
+        row_id = None
+        if self.store is not None:
+            row_id = await asyncio.to_thread(self.store.save, variables)
+        self._queue(row_id, variables)
+
+    async def restore(self) -> None:
+        """Queue again the completions saved but not sent before a restart."""
+        if self.store is None:
+            return
+        saved = await asyncio.to_thread(self.store.load)
+        if saved:
+            self.logger.info("Resending %s torrent completions", len(saved))
+        for row_id, variables in saved:
+            self._queue(row_id, variables)
+
+    def _queue(self, row_id: Optional[int], variables: dict) -> None:
+        """Queue a completion, flushing the window if full."""
+        self._pending.append((row_id, variables))
+        if len(self._pending) >= self.MAX_ITEMS or self.window <= 0:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            task = asyncio.create_task(self._flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def stop(self) -> None:
+        """Send the completions still waiting for their window."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self._flush()
+
+    async def _flush_later(self) -> None:
+        """Send the completions once the window is elapsed."""
+        await asyncio.sleep(self.window)
+        self._timer = None
+        await self._flush()
+
+    async def _flush(self) -> None:
+        """Send the pending completions as a single notification.
+
+        The saved completions are only forgotten once sent, so the ones
+        of a failed notification are sent again on the next start.
+        """
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.logger.debug("Sending %s torrent completions", len(pending))
+        try:
+            await self.send([variables for _row_id, variables in pending])
+        except Exception as e:
+            self.logger.error("Error sending torrent completions: %s", e)
+            return
+        ids = [row_id for row_id, _variables in pending if row_id is not None]
+        if ids:
+            try:
+                await asyncio.to_thread(self.store.delete, ids)
+            except sqlite3.Error as e:
+                self.logger.error("Error forgetting sent completions: %s", e)
@@ -1,43 +1,242 @@
 """Handlers for the Telegram bot application."""
 
+import asyncio
+import functools
 import os
-import shutil
+import sqlite3
 import subprocess
 import sys
-from typing import List
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
 from telegram import Update
-from telegram.error import Conflict
+from telegram.constants import MessageLimit
+from telegram.error import BadRequest, Conflict
 from telegram.ext import ContextTypes
+from telegram.helpers import escape_markdown
 
+from src import pages
 from src.config import Config
-from src.decorators import admin_only
-from src.kodi import KodiClient
+from src.decorators import admin_only, timed
+from src.digest import CompletionDigest, PendingCompletions
+from src.health import CircuitBreaker, HealthMonitor
+from src.ipc import TorrentIngestServer
+from src.locks import KeyedLocks
+from src.metrics import MetricsServer, metrics
+from src.outbox import Outbox
+from src.system import SystemSampler
+from src.torrents import (
+    TORRENT_ENV_VARS,
+    render_digest,
+    torrent_complete_message,
+    torrent_digest_message,
+    torrent_path,
+)
+
+if TYPE_CHECKING:
+    from src.classifier import Classification, MediaClassifier
+    from src.kodi import KodiClient, KodiNotifications
+    from src.library import LibraryCache
+    from src.scans import ScanScheduler
+    from src.tokens import CallbackTokenStore
+    from src.transfers import Transfer, TransferManager
+    from src.transmission import TransmissionClient
+
+
+KODI_UNAVAILABLE = "⚠️ Kodi unavailable, showing cached data"
 
 
 class Handlers:
-    """Handlers for the Telegram bot application."""
+    """Handlers for the Telegram bot application.
+
+    Every component logs through its own child logger of the bot logger
+    (e.g. `telegram_bot.kodi`), so their levels can be set apart.
+
+    Only the components needed to start are created with the handlers.
+    The Kodi and Transmission clients, the library cache and the other
+    components are imported and created on first use, to start faster.
+    """
+
+    PAGE_SIZES = {"movies": 25, "tvshows": 10}
 
     def __init__(self, config: Config):
         """Initialize the Handlers class with the given configuration."""
         self.config = config
         self.logger = config.logger
-        self.kodi_client = KodiClient(self.config.kodi, self.logger)
+        self.outbox = Outbox(
+            self.config.outbox,
+            self.logger.getChild("outbox"),
+        )
+        self.locks = KeyedLocks()
+        self.rendered = pages.RenderedPages(self.config.render_cache_bytes)
+        self._background: set = set()
+        self.health = HealthMonitor(
+            self.config.health,
+            self.logger.getChild("health"),
+        )
+        # The clients are only created on the first ping.
+        self.health.add(lambda: self.kodi_client.ping())  # noqa: PLW0108
+        self.health.add(lambda: self.transmission_client.ping())  # noqa: PLW0108
+        self.system = SystemSampler(
+            self.config.system,
+            self.logger.getChild("system"),
+            {
+                name: path
+                for name, path in (
+                    ("movies", self.config.kodi.movies_path),
+                    ("TV shows", self.config.kodi.tv_shows_path),
+                )
+                if path
+            },
+            self._jobs,
+            self._alert,
+        )
+        self.completions = CompletionDigest(
+            self.config.digest_window,
+            self._send_completions,
+            self.logger,
+            PendingCompletions(self.config.db_path, self.logger),
+        )
+        self.ingest_server = TorrentIngestServer(
+            self.config.socket_path,
+            self.logger,
+            self.notify_torrent_complete,
+        )
+        self.metrics_server = (
+            MetricsServer(
+                metrics,
+                self.config.metrics_listen,
+                self.config.metrics_port,
+                self.logger,
+            )
+            if self.config.metrics_port
+            else None
+        )
+
+    @functools.cached_property
+    def kodi_client(self) -> "KodiClient":
+        """Get the Kodi client, creating it on first use."""
+        import httpx  # noqa: PLC0415
+
+        from src.kodi import KodiClient  # noqa: PLC0415
+
+        return KodiClient(
+            self.config.kodi,
+            self.logger.getChild("kodi"),
+            CircuitBreaker(
+                "Kodi",
+                self.config.health,
+                self.logger.getChild("health"),
+                (httpx.TransportError,),
+            ),
+        )
+
+    @functools.cached_property
+    def kodi_notifications(self) -> "KodiNotifications":
+        """Get the Kodi notifications listener, creating it on first use."""
+        from src.kodi import KodiNotifications  # noqa: PLC0415
+
+        return KodiNotifications(
+            self.config.kodi,
+            self.logger.getChild("kodi"),
+        )
+
+    @functools.cached_property
+    def library(self) -> "LibraryCache":
+        """Get the library cache, creating it on first use."""
+        from src.library import LibraryCache  # noqa: PLC0415
+        from src.snapshot import LibrarySnapshot  # noqa: PLC0415
+
+        return LibraryCache(
+            self.kodi_client,
+            self.kodi_notifications,
+            self.logger.getChild("library"),
+            LibrarySnapshot(
+                self.config.snapshot_path,
+                self.logger.getChild("library"),
+            ),
+        )
+
+    @functools.cached_property
+    def scans(self) -> "ScanScheduler":
+        """Get the library scan scheduler, creating it on first use."""
+        from src.scans import ScanScheduler  # noqa: PLC0415
+
+        return ScanScheduler(
+            self.kodi_client,
+            self.kodi_notifications,
+            self.logger.getChild("scans"),
+        )
+
+    @functools.cached_property
+    def transfers(self) -> "TransferManager":
+        """Get the transfer manager, creating it on first use."""
+        from src.transfers import TransferManager  # noqa: PLC0415
+
+        return TransferManager(
+            self.config.transfer,
+            self.logger.getChild("transfers"),
+        )
+
+    @functools.cached_property
+    def transmission_client(self) -> "TransmissionClient":
+        """Get the Transmission client, creating it on first use."""
+        import httpx  # noqa: PLC0415
+
+        from src.transmission import TransmissionClient  # noqa: PLC0415
+
+        return TransmissionClient(
+            self.config.transmission,
+            self.logger.getChild("transmission"),
+            CircuitBreaker(
+                "Transmission",
+                self.config.health,
+                self.logger.getChild("health"),
+                (httpx.TransportError,),
+            ),
+        )
+
+    @functools.cached_property
+    def callback_tokens(self) -> "CallbackTokenStore":
+        """Get the callback token store, creating it on first use."""
+        from src.tokens import CallbackTokenStore  # noqa: PLC0415
+
+        return CallbackTokenStore(
+            self.config.db_path,
+            self.config.callback_token_ttl,
+            self.config.callback_token_max_entries,
+            self.logger,
+        )
+
+    def _created(self, name: str):
+        """Get a component created on first use, or None if never used."""
+        return self.__dict__.get(name)
 
     def name_list(self) -> List[str]:
         """Return a list of handler names for logging purposes."""
-        return ["hello", "reboot", "movies", "tvshows", "refresh"]
+        return [
+            "hello",
+            "reboot",
+            "movies",
+            "tvshows",
+            "search",
+            "refresh",
+            "stats",
+            "status",
+        ]
 
+    @timed(handler_name="hello")
     async def hello(
         self,
         update: Update,
         _context: ContextTypes.DEFAULT_TYPE,
     ) -> None:
         """Simple command handler that replies with a greeting message."""
-        await update.message.reply_text(
+        await self.outbox.reply(
+            update,
             f"Hello {update.effective_user.first_name}",
         )
 
+    @timed(handler_name="reboot")
     @admin_only(action_name="reboot")
     async def reboot(
         self,
@@ -49,7 +248,8 @@ class Handlers:
             self.logger.debug("Reboot command skipped")
         else:
             if self.config.can_send_notification:
-                await update.message.reply_text(
+                await self.outbox.reply(
+                    update,
                     "🔄 System is rebooting... Bot will be back online shortly",
                 )
             self.logger.warning(
@@ -58,61 +258,215 @@ class Handlers:
             )
             subprocess.run(["sudo", "reboot"], check=True)  # noqa: S607
 
+    async def _render_page(self, kind: str, page: int):
+        """Fetch and render a page of the given library listing.
+
+        The pages sliced from the library cache are rendered once,
+        and served from the rendered pages until the library changes.
+
+        Returns:
+            The Markdown text and the inline keyboard of the page.
+        """
+        page_size = self.PAGE_SIZES[kind]
+        start = page * page_size
+        library_kind = "movie" if kind == "movies" else "tvshow"
+        version = self.library.page_version(library_kind)
+        cached = (
+            self.rendered.get(
+                (kind, page),
+                version,
+                self.library.count(library_kind),
+                start + page_size,
+                functools.partial(self.library.changed_from, library_kind),
+            )
+            if version is not None
+            else None
+        )
+        if cached is not None:
+            text, reply_markup = cached
+        else:
+            if kind == "movies":
+                items, total = await self.library.get_movies_page(
+                    start,
+                    start + page_size,
+                )
+                render = pages.render_movies
+            else:
+                items, total = await self.library.get_tv_shows_page(
+                    start,
+                    start + page_size,
+                )
+                render = pages.render_tv_shows
+            count = pages.page_count(total, page_size)
+            text = pages.fit_message(
+                render(items, total, page, count),
+                MessageLimit.MAX_TEXT_LENGTH - len(KODI_UNAVAILABLE) - 2,
+            )
+            reply_markup = pages.page_keyboard(kind, page, count)
+            if version is not None and version == self.library.page_version(
+                library_kind,
+            ):
+                self.rendered.put(
+                    (kind, page),
+                    version,
+                    total,
+                    text,
+                    reply_markup,
+                )
+        if not self.kodi_client.available:
+            text = f"{KODI_UNAVAILABLE}\n\n{text}"
+        return text, reply_markup
+
+    @timed(handler_name="movies")
     @admin_only(action_name="get_movies")
     async def get_movies(
         self,
         update: Update,
         _context: ContextTypes.DEFAULT_TYPE,
     ) -> None:
-        """Command handler to get the list of movies from Kodi."""
-        response = self.kodi_client.get_movies()
-        message = f"🎬 *Movies in Kodi* ({len(response)} total)\n\n"
-        for movie in response:
-            message += f"🎥 *{movie.title}* ({movie.year})\n"
-
-        await update.message.reply_text(
-            message,
+        """Command handler to get the first page of movies from Kodi."""
+        text, reply_markup = await self._render_page("movies", 0)
+        await self.outbox.reply(
+            update,
+            text,
+            reply_markup=reply_markup,
             parse_mode="Markdown",
         )
 
+    @timed(handler_name="tvshows")
     @admin_only(action_name="get_tv_shows")
     async def get_tv_shows(
         self,
         update: Update,
         _context: ContextTypes.DEFAULT_TYPE,
     ) -> None:
-        """Command handler to get the list of TV shows from Kodi."""
-        response = self.kodi_client.get_tv_shows()
-        message = f"📺 *TV Shows in Kodi* ({len(response)} total)\n\n"
-        for show in response:
-            message += f"🎭 *{show.title}* ({show.year})\n"
-
-            if show.seasons:
-                for season in show.seasons:
-                    message += (
-                        f"   └ Season {season.season_number}: "
-                        f"{season.episode_count} episodes\n"
-                    )
-            else:
-                message += "   └ No seasons found\n"
-            message += "\n"
-
-        await update.message.reply_text(
-            message,
+        """Command handler to get the first page of TV shows from Kodi."""
+        text, reply_markup = await self._render_page("tvshows", 0)
+        await self.outbox.reply(
+            update,
+            text,
+            reply_markup=reply_markup,
             parse_mode="Markdown",
         )
 
+    @timed(handler_name="browse_page")
+    @admin_only(action_name="browse_page")
+    async def on_page_handler(
+        self,
+        update: Update,
+        _context: ContextTypes.DEFAULT_TYPE,
+    ) -> None:
+        """Callback handler for the Prev/Next buttons of library listings.
+
+        Expects callback data in format: "page|kind|page_number"
+        """
+        query = update.callback_query
+        await query.answer()
+
+        _prefix, kind, page = query.data.split("|")
+        text, reply_markup = await self._render_page(kind, int(page))
+        try:
+            await self.outbox.call(
+                update.effective_chat.id,
+                functools.partial(
+                    query.edit_message_text,
+                    text,
+                    reply_markup=reply_markup,
+                    parse_mode="Markdown",
+                ),
+            )
+        except BadRequest as e:
+            # e.g. the same button tapped twice renders the same page
+            if "not modified" not in str(e).lower():
+                raise
+            self.logger.debug("Page not updated: %s", e)
+
+    @timed(handler_name="search")
+    @admin_only(action_name="search")
+    async def search(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+    ) -> None:
+        """Command handler to search movies and TV shows by title."""
+        query = " ".join(context.args or [])
+        if not query:
+            await self.outbox.reply(update, "Usage: /search <text>")
+            return
+        results = await self.library.search(query)
+        text = pages.render_search_results(query, results)
+        if not self.kodi_client.available:
+            text = f"{KODI_UNAVAILABLE}\n\n{text}"
+        await self.outbox.reply(update, text, parse_mode="Markdown")
+
+    @timed(handler_name="refresh")
     async def refresh_kodi_library(
         self,
         update: Update,
         _context: ContextTypes.DEFAULT_TYPE,
     ) -> None:
         """Command handler to refresh the Kodi library."""
-        self.kodi_client.refresh_library()
-        await update.message.reply_text(
-            "🔄 Kodi library refresh completed",
-        )
+        if await self.scans.scan():
+            await self.outbox.reply(
+                update,
+                "🔄 Kodi library refresh completed",
+            )
+        elif not self.kodi_client.available:
+            await self.outbox.reply(
+                update,
+                "⚠️ Kodi unavailable, the library was not refreshed",
+            )
+        else:
+            await self.outbox.reply(
+                update,
+                "🔄 Kodi library refresh requested",
+            )
 
+    @timed(handler_name="stats")
+    @admin_only(action_name="stats")
+    async def stats(
+        self,
+        update: Update,
+        _context: ContextTypes.DEFAULT_TYPE,
+    ) -> None:
+        """Command handler to report the latency and counters of the bot."""
+        lines = metrics.summary() or ["No metrics recorded yet"]
+        text = "\n".join(["📊 Stats", "", *lines])
+        await self.outbox.reply(update, text[: MessageLimit.MAX_TEXT_LENGTH])
+
+    @timed(handler_name="status")
+    @admin_only(action_name="status")
+    async def status(
+        self,
+        update: Update,
+        _context: ContextTypes.DEFAULT_TYPE,
+    ) -> None:
+        """Command handler to report the recent status of the system.
+
+        The status is summarized from the samples already taken
+        in the background, as the current value and the min/avg/max
+        over the recent windows.
+        """
+        lines = self.system.summary() or ["No samples taken yet"]
+        if self.system.alerting:
+            lines.extend(["", f"⚠️ Alerts: {', '.join(self.system.alerting)}"])
+        text = "\n".join(["🖥 System status (now · min/avg/max)", "", *lines])
+        await self.outbox.reply(update, text[: MessageLimit.MAX_TEXT_LENGTH])
+
+    def _jobs(self) -> Dict[str, float]:
+        """Get the number of handlers and transfers in flight."""
+        return {
+            f"Jobs {name}": sum(metrics.gauges[f"{name}_in_flight"].values())
+            for name in ("handler", "transfer")
+        }
+
+    async def _alert(self, text: str) -> None:
+        """Send a system alert to the admin chat."""
+        self.logger.warning("System alert: %s", text)
+        if self.config.can_send_notification:
+            await self.outbox.send_message(self.config.admin_chat_id, text)
+
+    @timed(handler_name="torrent_complete")
     async def on_torrent_complete_handler(
         self,
         update: Update,
@@ -120,23 +474,76 @@ class Handlers:
     ) -> None:
         """Callback handler for processing torrent complete from inline buttons.
 
-        Expects callback data in format: "action|torrent_id|source_path|name"
+        Expects callback data in format: "action|token",
+        where the token references the torrent details in the token store.
 
         In Debug mode, it simulates the actions,
         without making actual changes to the filesystem or Kodi library.
         In Production mode, it moves the file to the selected Kodi media source,
         refreshes the Kodi library, and removes the torrent from Transmission.
+        Taps on the buttons of a choice already being processed are ignored,
+        and the ones of a choice already handled leave its result as is.
         """
         query = update.callback_query
-        await query.answer()
+        # Buttons sent before the tokens carry "action|id|dir|name":
+        # their token is unknown, so they are answered as expired.
+        action, token = query.data.split("|", 1)
+        key = f"token:{token}"
+        # Claimed before awaiting anything, so a double tap cannot pass.
+        if not self.locks.claim(key):
+            metrics.inc("duplicate_callbacks_total")
+            await query.answer("⏳ Already in progress")
+            return
+        try:
+            if await asyncio.to_thread(self.callback_tokens.get, token) is None:
+                # Unknown, expired or handled by an earlier tap:
+                # the message is left as is, e.g. with its result.
+                await query.answer("⌛ This choice has expired")
+                return
+            await query.answer()
+            async with self.locks.hold(key):
+                await self._complete_torrent(update, action, token)
+        finally:
+            self.locks.release(key)
 
-        action, t_id, src, name = query.data.split("|")
-        pretty_action = "Movie" if action == "movies" else "TV Shows"
-        dest = (
-            self.config.kodi.movies_path
-            if action == "movies"
-            else self.config.kodi.tv_shows_path
-        )
+    async def _complete_torrent(
+        self,
+        update: Update,
+        action: str,
+        token: str,
+    ) -> None:
+        """Move a completed torrent to the media source chosen by the user.
+
+        Moves and removals of the same torrent, or to the same path,
+        are serialized, while the other torrents are processed in parallel.
+        A torrent of a digest reports in its own line of the digest.
+        """
+        query = update.callback_query
+        # Read again once the token is held, as the bulk action
+        # of its digest may have handled it meanwhile.
+        torrent = await asyncio.to_thread(self.callback_tokens.get, token)
+        if torrent is None:
+            return
+        if "items" in torrent:
+            await self._complete_digest(update, action, token, torrent)
+            return
+        t_id, name = torrent["id"], torrent["name"]
+        digest = torrent.get("digest")
+        pretty_action, dest, source = self._destination(action)
+
+        async def show(text: str, done: bool = False) -> None:
+            if digest is not None:
+                await self._show_in_digest(
+                    update,
+                    digest,
+                    {token: text},
+                    {token} if done else (),
+                )
+                return
+            await self.outbox.call(
+                update.effective_chat.id,
+                functools.partial(query.edit_message_text, text=text),
+            )
 
         try:
             if dest is None:
@@ -156,27 +563,515 @@ class Handlers:
                     t_id,
                 )
                 return
-            shutil.move(os.path.join(src, name), os.path.join(dest, name))
-            self.kodi_client.refresh_library()
-            subprocess.run(  # noqa: S603
-                [
-                    "/usr/bin/transmission-remote",
-                    "-n",
-                    f"{self.config.transmission.username}:{self.config.transmission.password}",
-                    "-t",
-                    t_id,
-                    "--remove",
-                ],
-                check=False,
-            )
-            await query.edit_message_text(
-                text=f"✅ Moved {name} to {pretty_action} media source. \n"
-                f"Torrent is removed and Kodi library refreshed.",
+
+            async def report_progress(transfer: "Transfer") -> None:
+                await show(
+                    f"🚚 Moving {name} to {pretty_action} "
+                    f"media source: {transfer.percent:.0f}% "
+                    f"({transfer.throughput / 1e6:.1f} MB/s)",
+                )
+
+            await self._move_torrent(torrent, dest, report_progress)
+            removed = await self.transmission_client.remove_torrents(
+                [int(t_id)],
             )
+            # Moved anyway: the choice cannot be made again.
+            await asyncio.to_thread(self.callback_tokens.delete, token)
+            # Reported before the scan, which can take minutes,
+            # so the token is not held until it is finished.
+            self._in_background(self.scans.scan(source))
+            if digest is not None:
+                await show(
+                    f"✅ {name} moved to {pretty_action}"
+                    if removed
+                    else f"⚠️ {name} moved to {pretty_action}, "
+                    "not removed from Transmission",
+                    done=True,
+                )
+            elif removed:
+                await show(
+                    f"✅ Moved {name} to {pretty_action} media source. \n"
+                    f"Torrent is removed and Kodi library is refreshing.",
+                )
+            else:
+                await show(
+                    f"⚠️ Moved {name} to {pretty_action} media source, "
+                    "but the torrent could not be removed from Transmission. "
+                    "\nKodi library is refreshing.",
+                )
 
         except Exception as e:
             self.logger.error("Error processing torrent completion: %s", e)
-            await query.edit_message_text(text=f"❌ Error processing {name}")
+            await show(f"❌ Error processing {name}")
+
+    async def _complete_digest(
+        self,
+        update: Update,
+        action: str,
+        digest: str,
+        payload: dict,
+    ) -> None:
+        """Move every torrent of a digest not handled yet.
+
+        All the torrents are moved first, then the moved ones are removed
+        from Transmission at once, and the media source is scanned once.
+        """
+        pending = [
+            item["token"]
+            for item in payload["items"]
+            if item["token"] not in payload["results"]
+        ]
+        async with self.locks.hold(*(f"token:{token}" for token in pending)):
+            payloads = await asyncio.to_thread(
+                lambda: [self.callback_tokens.get(token) for token in pending],
+            )
+            torrents = {
+                token: torrent
+                for token, torrent in zip(pending, payloads)
+                if torrent is not None
+            }
+            if not torrents:
+                await self._show_in_digest(update, digest, {})
+                return
+            pretty_action, dest, source = self._destination(action)
+            lines = {
+                token: f"🚚 Moving {torrent['name']} to {pretty_action}"
+                for token, torrent in torrents.items()
+            }
+            try:
+                if dest is None:
+                    raise ValueError(
+                        f"Destination path for {pretty_action} "
+                        "is not configured",
+                    )
+                if self.config.debug:
+                    self.logger.debug(
+                        "Simulating move of %s torrents to %s (%s)",
+                        len(torrents),
+                        pretty_action,
+                        dest,
+                    )
+                    return
+                await self._show_in_digest(update, digest, lines)
+
+                def report_progress(token: str):
+                    async def report(transfer: "Transfer") -> None:
+                        lines[token] = (
+                            f"🚚 Moving {torrents[token]['name']} to "
+                            f"{pretty_action}: {transfer.percent:.0f}%"
+                        )
+                        await self._show_in_digest(update, digest, lines)
+
+                    return report
+
+                results = await asyncio.gather(
+                    *(
+                        self._move_torrent(
+                            torrent,
+                            dest,
+                            report_progress(token),
+                        )
+                        for token, torrent in torrents.items()
+                    ),
+                    return_exceptions=True,
+                )
+                moved = []
+                for (token, torrent), result in zip(torrents.items(), results):
+                    if isinstance(result, Exception):
+                        self.logger.error(
+                            "Error moving %s: %s",
+                            torrent["name"],
+                            result,
+                        )
+                        lines[token] = f"❌ Error moving {torrent['name']}"
+                    else:
+                        moved.append(token)
+                        lines[token] = (
+                            f"✅ {torrent['name']} moved to {pretty_action}"
+                        )
+                if moved:
+                    removed = await self.transmission_client.remove_torrents(
+                        [int(torrents[token]["id"]) for token in moved],
+                    )
+                    if not removed:
+                        for token in moved:
+                            lines[token] = (
+                                f"⚠️ {torrents[token]['name']} moved to "
+                                f"{pretty_action}, not removed from "
+                                "Transmission"
+                            )
+                    self._in_background(self.scans.scan(source))
+                    for token in moved:
+                        await asyncio.to_thread(
+                            self.callback_tokens.delete,
+                            token,
+                        )
+                await self._show_in_digest(update, digest, lines, moved)
+
+            except Exception as e:
+                self.logger.error("Error processing torrent completions: %s", e)
+                await self._show_in_digest(
+                    update,
+                    digest,
+                    {
+                        token: f"❌ Error processing {torrent['name']}"
+                        for token, torrent in torrents.items()
+                    },
+                )
+
+    def _destination(self, action: str):
+        """Get the name, the path and the Kodi source of a media type.
+
+        Returns:
+            The name, the destination path (None if not configured)
+            and the Kodi source directory of the media type.
+        """
+        from src.scans import source_directory  # noqa: PLC0415
+
+        if action == "movies":
+            return (
+                "Movie",
+                self.config.kodi.movies_path,
+                source_directory(self.config.kodi.movies_source),
+            )
+        return (
+            "TV Shows",
+            self.config.kodi.tv_shows_path,
+            source_directory(self.config.kodi.tv_shows_source),
+        )
+
+    async def _move_torrent(self, torrent: dict, dest: str, progress) -> None:
+        """Move the files of a torrent to the destination folder."""
+        target = os.path.join(dest, torrent["name"])
+        async with self.locks.hold(
+            f"torrent:{torrent['id']}",
+            f"path:{target}",
+        ):
+            await self.transfers.move(
+                os.path.join(torrent["dir"], torrent["name"]),
+                target,
+                progress=progress,
+            )
+
+    async def _show_in_digest(
+        self,
+        update: Update,
+        digest: str,
+        lines: Dict[str, str],
+        done: Iterable[str] = (),
+    ) -> None:
+        """Update the lines of some torrents in their digest.
+
+        Args:
+            update: The update of the pressed button.
+            digest: The token of the digest.
+            lines: The status lines to show, by torrent token.
+            done: The torrents whose line is final.
+        """
+        async with self.locks.hold(f"digest:{digest}"):
+            payload = await asyncio.to_thread(self.callback_tokens.get, digest)
+            if payload is None:
+                return
+            for token in done:
+                payload["results"][token] = lines[token]
+            if done:
+                await asyncio.to_thread(
+                    self.callback_tokens.update,
+                    digest,
+                    payload,
+                )
+            text, reply_markup = render_digest(digest, payload, lines)
+            if reply_markup is None:
+                await asyncio.to_thread(self.callback_tokens.delete, digest)
+            try:
+                await self.outbox.call(
+                    update.effective_chat.id,
+                    functools.partial(
+                        update.callback_query.edit_message_text,
+                        text=text,
+                        reply_markup=reply_markup,
+                        parse_mode="Markdown",
+                    ),
+                )
+            except BadRequest as e:
+                # e.g. the message is not modified
+                self.logger.debug("Digest not updated: %s", e)
+
+    async def startup(self, application) -> None:
+        """Start the background services of the handlers on startup."""
+        self.outbox.start(application.bot)
+        try:
+            await self.completions.restore()
+        except sqlite3.Error as e:
+            self.logger.error("Error restoring torrent completions: %s", e)
+        self.health.start()
+        self.system.start()
+        try:
+            await self.ingest_server.start()
+        except OSError as e:
+            self.logger.error("Error listening for torrent hooks: %s", e)
+        if self.metrics_server is not None:
+            try:
+                await self.metrics_server.start()
+            except OSError as e:
+                self.logger.error("Error serving metrics: %s", e)
+
+    async def notify_torrent_complete(self, variables) -> None:
+        """Send the Torrent complete notification received from the hook.
+
+        The completions received within the digest window are sent
+        together, in a single notification. The hook is answered as soon
+        as the completion is saved.
+        """
+        await self.completions.add(variables)
+
+    async def _send_completions(
+        self,
+        completions: List[Dict[str, Optional[str]]],
+    ) -> None:
+        """Send the notification of the torrents completed in a window.
+
+        The torrents classified with confidence from their name are filed
+        right away, once Transmission confirms where they are, only the
+        other ones wait for the choice of the user.
+        """
+        torrents, others = [], []
+        for variables in completions:
+            if all(variables.get(name) for name in TORRENT_ENV_VARS):
+                torrents.append(
+                    {
+                        "id": variables["TR_TORRENT_ID"],
+                        "dir": variables["TR_TORRENT_DIR"],
+                        "name": variables["TR_TORRENT_NAME"],
+                    },
+                )
+            else:
+                others.append(variables)
+        classified = []
+        if self.config.auto_classify and torrents:
+            confirmed = await self._confirmed(torrents)
+            classifier = await self._classifier()
+            ambiguous = []
+            for torrent in torrents:
+                classification = (
+                    classifier.classify(torrent["name"])
+                    if torrent["id"] in confirmed
+                    else None
+                )
+                if classification is None:
+                    ambiguous.append(torrent)
+                else:
+                    classified.append((torrent, classification))
+            torrents = ambiguous
+        if classified:
+            self._in_background(self._file_automatically(classified))
+        await self._ask_choices(torrents, others)
+
+    async def _ask_choices(
+        self,
+        torrents: List[Dict[str, str]],
+        others: Iterable[Dict[str, Optional[str]]] = (),
+    ) -> None:
+        """Ask the media type of torrents, in a single digest if several.
+
+        Args:
+            torrents: The details of the completed torrents.
+            others: The variables of completions without all the details.
+        """
+
+        def build() -> list:
+            notifications = [
+                torrent_complete_message(
+                    variables.get("TR_TORRENT_ID"),
+                    variables.get("TR_TORRENT_DIR"),
+                    variables.get("TR_TORRENT_NAME"),
+                    self.callback_tokens,
+                )
+                for variables in others
+            ]
+            if len(torrents) > 1:
+                notifications.insert(
+                    0,
+                    torrent_digest_message(torrents, self.callback_tokens),
+                )
+            elif torrents:
+                notifications.insert(
+                    0,
+                    torrent_complete_message(
+                        torrents[0]["id"],
+                        torrents[0]["dir"],
+                        torrents[0]["name"],
+                        self.callback_tokens,
+                    ),
+                )
+            return notifications
+
+        # Issuing the tokens writes to the database, in a worker thread
+        for text, reply_markup in await asyncio.to_thread(build):
+            await self.outbox.send_message(
+                self.config.admin_chat_id,
+                text,
+                reply_markup=reply_markup,
+                parse_mode="Markdown",
+            )
+
+    async def _confirmed(self, torrents: List[Dict[str, str]]) -> set:
+        """Get the ids of the torrents that can be filed without asking.
+
+        The details come from the hook, over a socket writable by its
+        group, so a torrent is only filed without asking when its name
+        is a single path component in its download directory,
+        and Transmission reports the same name and directory for its id.
+        """
+        candidates = {
+            int(torrent["id"]): torrent
+            for torrent in torrents
+            if torrent["id"].isdigit()
+            and torrent_path(torrent["dir"], torrent["name"]) is not None
+        }
+        if not candidates:
+            return set()
+        known = await self.transmission_client.get_torrents(
+            list(candidates),
+            ["id", "name", "downloadDir"],
+        )
+        confirmed = set()
+        for details in known:
+            torrent = candidates.get(details.get("id"))
+            if (
+                torrent is not None
+                and details.get("name") == torrent["name"]
+                and details.get("downloadDir")
+                and os.path.realpath(details["downloadDir"])
+                == os.path.realpath(torrent["dir"])
+            ):
+                confirmed.add(torrent["id"])
+        for torrent in torrents:
+            if torrent["id"] not in confirmed:
+                self.logger.warning(
+                    "Not filing %s automatically: unconfirmed location",
+                    torrent["name"],
+                )
+        return confirmed
+
+    async def _classifier(self) -> "MediaClassifier":
+        """Create a classifier knowing the TV shows of the Kodi library."""
+        from src.classifier import MediaClassifier  # noqa: PLC0415
+
+        try:
+            shows = await self.library.get_tv_shows()
+        except Exception as e:
+            self.logger.warning("Error getting the known TV shows: %s", e)
+            shows = []
+        return MediaClassifier(show.title for show in shows)
+
+    async def _file_automatically(
+        self,
+        classified: List[Tuple[Dict[str, str], "Classification"]],
+    ) -> None:
+        """File the classified torrents without asking the user.
+
+        All the torrents are moved first, then the moved ones are removed
+        from Transmission at once, and each media source is scanned once.
+        The torrents that could not be filed fall back to the buttons.
+        """
+        from src.classifier import media_folder  # noqa: PLC0415
+
+        if self.config.debug:
+            for torrent, classification in classified:
+                self.logger.debug(
+                    "Simulating filing of %s: %s",
+                    torrent["name"],
+                    classification,
+                )
+            return
+
+        async def file(torrent: dict, classification: "Classification"):
+            pretty_action, dest, _source = self._destination(
+                classification.kind,
+            )
+            if dest is None:
+                raise ValueError(
+                    f"Destination path for {pretty_action} is not configured",
+                )
+            folder = await asyncio.to_thread(
+                media_folder,
+                dest,
+                classification,
+            )
+            await self._move_torrent(torrent, folder, None)
+            return os.path.join(pretty_action, os.path.relpath(folder, dest))
+
+        results = await asyncio.gather(
+            *(file(*item) for item in classified),
+            return_exceptions=True,
+        )
+        lines, moved, kinds, failed = [], [], set(), []
+        for (torrent, classification), result in zip(classified, results):
+            if isinstance(result, Exception):
+                self.logger.error(
+                    "Error filing %s: %s",
+                    torrent["name"],
+                    result,
+                )
+                failed.append(torrent)
+                continue
+            moved.append(int(torrent["id"]))
+            kinds.add(classification.kind)
+            lines.append(f"✅ {torrent['name']} → {os.path.normpath(result)}")
+        if moved:
+            try:
+                if not await self.transmission_client.remove_torrents(moved):
+                    lines.append(
+                        "⚠️ The torrents could not be removed from Transmission",
+                    )
+                await asyncio.gather(
+                    *(
+                        self.scans.scan(self._destination(kind)[2])
+                        for kind in kinds
+                    ),
+                )
+            except Exception as e:
+                self.logger.error("Error finishing the filing: %s", e)
+            await self.outbox.send_message(
+                self.config.admin_chat_id,
+                "\n".join(
+                    [
+                        "🤖 *Filed automatically*",
+                        *(escape_markdown(line) for line in lines),
+                    ],
+                ),
+                parse_mode="Markdown",
+            )
+        await self._ask_choices(failed)
+
+    def _in_background(self, coro) -> None:
+        """Run a task in the background, keeping a reference."""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def shutdown(self, _application) -> None:
+        """Release the resources held by the handlers on shutdown."""
+        await self.health.stop()
+        await self.system.stop()
+        await self.ingest_server.stop()
+        await self.completions.stop()
+        if self.completions.store is not None:
+            self.completions.store.close()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        if notifications := self._created("kodi_notifications"):
+            await notifications.stop()
+        if kodi_client := self._created("kodi_client"):
+            await kodi_client.close()
+        if transmission_client := self._created("transmission_client"):
+            await transmission_client.close()
+        if transfers := self._created("transfers"):
+            transfers.shutdown()
+        if callback_tokens := self._created("callback_tokens"):
+            callback_tokens.close()
+        await self.outbox.stop()
 
     async def error_handler(
         self,
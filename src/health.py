@@ -0,0 +1,210 @@
+"""Health tracking of the backends: circuit breakers and liveness pings."""
+
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Awaitable, Callable, Iterator, List, Optional, Tuple
+
+import httpx
+
+from src.metrics import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is refused because its backend is down."""
+
+
+class CircuitBreaker:
+    """Circuit breaker guarding the requests to a backend.
+
+    After `failure_threshold` consecutive failures the circuit opens,
+    and requests fail fast instead of waiting for the timeout.
+    Once the reset timeout is elapsed, a single probe request is let
+    through (half-open): it closes the circuit when it succeeds,
+    otherwise the circuit opens again for twice as long.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        health_config,
+        logger,
+        failure_types: Tuple[type, ...] = (OSError,),
+    ):
+        """Initialize the CircuitBreaker class.
+
+        Args:
+            name: Name of the backend, for logs and metrics.
+            health_config: The health tracking configuration.
+            logger: Logger instance.
+            failure_types: Exceptions meaning the backend is unreachable.
+        """
+        self.name = name
+        self.config = health_config
+        self.logger = logger
+        self.failure_types = failure_types
+        self.state = CLOSED
+        self.failures = 0
+        self.reset_timeout = self.config.reset_timeout
+        self.opened_until = 0.0
+        self._probing = False
+
+    @property
+    def available(self) -> bool:
+        """Check if the backend is believed to be up."""
+        return self.state == CLOSED
+
+    def allow(self) -> bool:
+        """Check if a request can be sent now, claiming the probe if due."""
+        if self.state == CLOSED:
+            return True
+        if self._probing or time.monotonic() < self.opened_until:
+            return False
+        self.state = HALF_OPEN
+        self._probing = True
+        return True
+
+    def check(self) -> None:
+        """Fail a request that was queued while the circuit opened.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+        """
+        if self.state == OPEN:
+            raise CircuitOpenError(f"{self.name} is unavailable")
+
+    def record_success(self) -> None:
+        """Record a request answered by the backend."""
+        if self.state != CLOSED:
+            self.logger.info("%s is available again", self.name)
+        self.state = CLOSED
+        self.failures = 0
+        self.reset_timeout = self.config.reset_timeout
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Record a request that could not reach the backend."""
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self.reset_timeout = min(
+                self.reset_timeout * 2,
+                self.config.max_reset_timeout,
+            )
+        elif self.failures < self.config.failure_threshold:
+            return
+        else:
+            self.logger.warning("%s is unavailable", self.name)
+            metrics.inc("circuit_open_total", backend=self.name)
+        self.state = OPEN
+        self.opened_until = time.monotonic() + self.reset_timeout
+        self._probing = False
+
+    @contextlib.contextmanager
+    def track(self) -> Iterator[None]:
+        """Guard a request, recording its outcome.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} is unavailable")
+        try:
+            yield
+        except CircuitOpenError:
+            raise
+        except self.failure_types:
+            self.record_failure()
+            raise
+        except Exception:
+            # The backend answered, even if with an error.
+            self.record_success()
+            raise
+        except BaseException:
+            # The request was cancelled: release the probe.
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+                self._probing = False
+            raise
+        else:
+            self.record_success()
+
+    @contextlib.contextmanager
+    def reporting(
+        self,
+        skipped: str,
+        level: int = logging.DEBUG,
+    ) -> Iterator[None]:
+        """Log and swallow the errors of the requests to the backend.
+
+        The block is left on the first error, so the caller falls through
+        to its fallback result, e.g. an empty response.
+
+        Args:
+            skipped: What is skipped while the circuit is open, for logs.
+            level: Logging level of the requests skipped while open.
+        """
+        try:
+            yield
+        except CircuitOpenError:
+            self.logger.log(
+                level,
+                "%s unavailable, skipped %s",
+                self.name,
+                skipped,
+            )
+        except httpx.ConnectError as e:
+            self.logger.error("Error connecting to %s: %s", self.name, e)
+        except (httpx.HTTPError, ValueError) as e:
+            self.logger.error("Error querying %s: %s", self.name, e)
+
+
+class HealthMonitor:
+    """Background liveness pings of the backends.
+
+    Each backend is pinged every `check_interval` seconds through its
+    circuit breaker, so a backend going down opens its circuit before
+    a user waits for it, and a backend coming back closes it.
+    """
+
+    def __init__(self, health_config, logger):
+        """Initialize the HealthMonitor class with the given configuration."""
+        self.config = health_config
+        self.logger = logger
+        self._pings: List[Callable[[], Awaitable[object]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, ping: Callable[[], Awaitable[object]]) -> None:
+        """Add a coroutine function pinging a backend."""
+        self._pings.append(ping)
+
+    def start(self) -> None:
+        """Start pinging the backends, if not already started."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop pinging the backends."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Ping every backend at each interval."""
+        while True:
+            await asyncio.sleep(self.config.check_interval)
+            results = await asyncio.gather(
+                *(ping() for ping in self._pings),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    self.logger.debug("Health check failed: %s", result)
@@ -0,0 +1,76 @@
+"""Local ingestion endpoint for the torrent completion hook."""
+
+import asyncio
+import json
+import os
+from typing import Awaitable, Callable, Dict, Optional
+
+from src.torrents import TORRENT_ENV_VARS
+
+
+class TorrentIngestServer:
+    """Unix socket server receiving the torrent completions from the hook.
+
+    The hook sends a single JSON line with the `TR_TORRENT_*` variables
+    and waits for a `ok` or `error` line back, once the bot has saved it.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        logger,
+        on_torrent: Callable[[Dict[str, Optional[str]]], Awaitable[None]],
+    ):
+        """Initialize the TorrentIngestServer class.
+
+        Args:
+            socket_path: Path of the Unix socket to listen on.
+            logger: Logger instance.
+            on_torrent: Coroutine called with the torrent variables.
+        """
+        self.socket_path = socket_path
+        self.logger = logger
+        self.on_torrent = on_torrent
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """Start listening on the Unix socket."""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._server = await asyncio.start_unix_server(
+            self._handle,
+            path=self.socket_path,
+        )
+        # Transmission usually runs as a different user of the same group
+        os.chmod(self.socket_path, 0o660)  # noqa: S103
+        self.logger.info("Listening for torrent hooks on %s", self.socket_path)
+
+    async def stop(self) -> None:
+        """Stop listening and remove the Unix socket."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Handle a single hook connection."""
+        try:
+            line = await asyncio.wait_for(reader.readline(), timeout=5)
+            message = json.loads(line)
+            variables = {name: message.get(name) for name in TORRENT_ENV_VARS}
+            self.logger.debug("Received torrent hook: %s", variables)
+            await self.on_torrent(variables)
+            writer.write(b"ok\n")
+        except Exception as e:
+            self.logger.error("Error handling torrent hook: %s", e)
+            writer.write(b"error\n")
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
@@ -0,0 +1,94 @@
+"""Incremental parsing of the items of a JSON array inside a large response."""
+
+import json
+import re
+from typing import Any, List
+
+
+class JSONArrayStream:
+    """Parse the items of the array under a given key while text arrives.
+
+    Only the item being received is buffered, so parsing a response
+    with thousands of items needs memory for one chunk and one item,
+    not for the whole document.
+    Responses without the key (e.g. an empty library) simply produce
+    no items, while a JSON-RPC error raises instead of passing
+    for an empty result.
+    """
+
+    _WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, key: str):
+        """Initialize the JSONArrayStream class for the array under `key`."""
+        self._start = re.compile(rf'(?<!\\)"{re.escape(key)}"\s*:\s*\[')
+        self._error = re.compile(r'(?<!\\)"error"\s*:')
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._state = "seeking"
+        self._keep = len(key) + 16
+
+    def feed(self, text: str) -> List[Any]:
+        """Add a chunk of text and return the items completed by it.
+
+        Raises:
+            ValueError: If the response is a JSON-RPC error.
+        """
+        if self._state == "done":
+            return []
+        self._buffer += text
+        if self._state == "seeking":
+            match = self._start.search(self._buffer)
+            # Only searched before the array, where it is the error member
+            # of the response and not a field of an item.
+            end = match.start() if match else len(self._buffer)
+            if self._error.search(self._buffer, 0, end):
+                raise ValueError("JSON-RPC error in Kodi response")
+            if match is None:
+                self._buffer = self._buffer[-self._keep :]
+                return []
+            self._buffer = self._buffer[match.end() :]
+            self._state = "items"
+        return self._parse_items()
+
+    def close(self) -> None:
+        """Check that the array was complete when the response ended.
+
+        Raises:
+            ValueError: If the response ended in the middle of the array,
+                or before the end of a response without the array.
+        """
+        if self._state == "items":
+            raise ValueError("Truncated JSON array in Kodi response")
+        if self._state == "seeking" and not self._buffer.rstrip().endswith(
+            "}",
+        ):
+            raise ValueError("Truncated Kodi response")
+
+    def _parse_items(self) -> List[Any]:
+        """Decode the complete items at the start of the buffer."""
+        items = []
+        buffer = self._buffer
+        position = 0
+        scan = self._decoder.scan_once
+        while True:
+            if buffer.startswith(",", position):
+                position += 2 if buffer.startswith(" ", position + 1) else 1
+            try:
+                item, position = scan(buffer, position)
+            except (StopIteration, json.JSONDecodeError):
+                skipped = self._WHITESPACE.match(buffer, position).end()
+                if skipped == len(buffer):
+                    position = skipped
+                    break
+                if buffer[skipped] == "]":
+                    self._state = "done"
+                    buffer, position = "", 0
+                    break
+                if skipped > position or buffer[skipped] == ",":
+                    position = skipped
+                    continue
+                # The item is not complete yet, wait for more text.
+                break
+            items.append(item)
+        self._buffer = buffer[position:]
+        return items
@@ -1,102 +1,582 @@
 """Kodi client to interact with the Kodi media center."""
 
-from typing import List
+import asyncio
+import codecs
+import json
+from collections import defaultdict
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 
-import requests
+import httpx
 
+from src.config import HealthConfig
+from src.health import CircuitBreaker
+from src.jsonstream import JSONArrayStream
+from src.metrics import metrics
 from src.models import Movie, TVShow, TVShowSeason
 
 
 class KodiClient:
-    """Client to interact with the Kodi media center using JSON-RPC API."""
+    """Client to interact with the Kodi media center using JSON-RPC API.
 
-    def __init__(self, kodi_config, logger):
+    Requests are sent through a single pooled keep-alive HTTP session,
+    so the event loop is never blocked while Kodi is answering.
+    The number of concurrent requests is capped by a semaphore.
+    While Kodi is unreachable, e.g. when the TV box sleeps, a circuit
+    breaker makes the requests fail fast instead of waiting the timeout.
+    """
+
+    def __init__(
+        self,
+        kodi_config,
+        logger,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
         """Initialize the Kodi class with the given configuration."""
         self.config = kodi_config
         self.logger = logger
+        self.breaker = breaker or CircuitBreaker(
+            "Kodi",
+            HealthConfig(),
+            logger,
+            (httpx.TransportError,),
+        )
         self.url = f"http://{self.config.ip}:{self.config.port}/jsonrpc"
         self.auth = (
             (self.config.username, self.config.password)
             if self.config.username and self.config.password
             else None
         )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Get the HTTP session, creating it if it doesn't exist."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                auth=self.auth,
+                timeout=self.config.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.config.max_connections,
+                    max_keepalive_connections=self.config.max_connections,
+                ),
+            )
+        return self._client
 
-    def _query_kodi(self, method, params=None):
-        """Internal method to send a JSON-RPC request to Kodi."""
+    @property
+    def available(self) -> bool:
+        """Check if Kodi is believed to be reachable."""
+        return self.breaker.available
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore capping the number of concurrent requests."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.config.max_connections)
+        return self._semaphore
+
+    async def close(self) -> None:
+        """Close the HTTP session and release pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _query_kodi(self, method, params=None, timeout=None):
+        """Internal method to send a JSON-RPC request to Kodi.
+
+        Args:
+            method: The JSON-RPC method name.
+            params: The JSON-RPC parameters.
+            timeout: Optional timeout in seconds overriding the default one.
+        """
         payload = {
             "jsonrpc": "2.0",
             "id": 1,
             "method": method,
             "params": params or {},
         }
-        try:
+        with self.breaker.reporting(method):
             self.logger.debug(
                 "Sending request to Kodi: %s with params: %s",
                 method,
                 payload["params"],
             )
-            return requests.post(
-                self.url,
-                json=payload,
-                auth=self.auth,
-                timeout=5,
-            ).json()
-        except requests.RequestException as e:
-            self.logger.error("Error querying Kodi: %s", e)
-            return {}
-        except requests.ConnectionError as e:
-            self.logger.error("Error connecting to Kodi: %s", e)
-            return {}
-
-    def refresh_library(self) -> None:
-        """Refresh the Kodi library."""
-        self._query_kodi("VideoLibrary.Scan")
-
-    def get_movies(self) -> List[Movie]:
-        """Get the list of movies from Kodi."""
+            with self.breaker.track():
+                async with self.semaphore:
+                    self.breaker.check()
+                    with metrics.timer("kodi_request", method=method):
+                        response = await self.client.post(
+                            self.url,
+                            json=payload,
+                            timeout=timeout or self.config.timeout,
+                        )
+                        return response.json()
+        return {}
+
+    async def _query_kodi_batch(self, calls):
+        """Internal method to send several JSON-RPC requests in one batch.
+
+        Args:
+            calls: List of (method, params) tuples.
+
+        Returns:
+            The list of responses, in the same order as the calls.
+        """
+        if not calls:
+            return []
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": index,
+                "method": method,
+                "params": params or {},
+            }
+            for index, (method, params) in enumerate(calls)
+        ]
+        results = None
+        with self.breaker.reporting("batch"):
+            self.logger.debug(
+                "Sending batch of %s requests to Kodi",
+                len(calls),
+            )
+            with self.breaker.track():
+                async with self.semaphore:
+                    self.breaker.check()
+                    with metrics.timer("kodi_request", method="batch"):
+                        response = await self.client.post(
+                            self.url,
+                            json=payload,
+                        )
+                        results = response.json()
+        if not isinstance(results, list):
+            return [{} for _ in calls]
+        by_id = {result.get("id"): result for result in results}
+        return [by_id.get(index, {}) for index in range(len(calls))]
+
+    async def _stream_kodi(
+        self,
+        method: str,
+        params: dict,
+        key: str,
+    ) -> AsyncIterator[List[dict]]:
+        """Internal method to stream the items of a large JSON-RPC result.
+
+        The response is parsed while it is received, and the items
+        of the `result.<key>` array are yielded in batches, one per chunk
+        of the response, so the whole document is never held in memory.
+
+        Raises:
+            CircuitOpenError: If Kodi is unavailable.
+            httpx.HTTPError: If the request fails.
+            ValueError: If the response is truncated or an error.
+        """
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": method,
+            "params": params,
+        }
+        self.logger.debug(
+            "Streaming request to Kodi: %s with params: %s",
+            method,
+            params,
+        )
+        parser = JSONArrayStream(key)
+        with self.breaker.track():
+            async with self.semaphore:
+                self.breaker.check()
+                with metrics.timer("kodi_request", method=method):
+                    async with self.client.stream(
+                        "POST",
+                        self.url,
+                        json=payload,
+                    ) as response:
+                        response.raise_for_status()
+                        async for text in response.aiter_text():
+                            if batch := parser.feed(text):
+                                yield batch
+                    parser.close()
+
+    async def ping(self) -> bool:
+        """Check if Kodi answers, e.g. for the liveness health checks."""
+        response = await self._query_kodi("JSONRPC.Ping")
+        return response.get("result") == "pong"
+
+    async def refresh_library(self, directory: Optional[str] = None) -> bool:
+        """Refresh the Kodi library, or only the given source directory.
+
+        Returns:
+            True if Kodi accepted the scan request.
+        """
+        params = {"directory": directory} if directory else None
+        response = await self._query_kodi("VideoLibrary.Scan", params)
+        return response.get("result") == "OK"
+
+    async def get_library_signature(self, kind: str) -> Optional[list]:
+        """Get a cheap signature of the movies or TV shows in the library.
+
+        The signature is made of the item counts and the date the last
+        movie or episode was added, fetched by sorting on `dateadded`
+        with a single item limit, so it changes when items are added
+        or removed without listing the whole library.
+
+        Args:
+            kind: "movie" or "tvshow".
+
+        Returns:
+            The signature, or None if Kodi could not be queried.
+        """
+        latest = {
+            "properties": ["dateadded"],
+            "limits": {"start": 0, "end": 1},
+            "sort": {"method": "dateadded", "order": "descending"},
+        }
+        if kind == "movie":
+            calls = [("VideoLibrary.GetMovies", latest)]
+            keys = ["movies"]
+        else:
+            calls = [
+                ("VideoLibrary.GetTVShows", {"limits": {"start": 0, "end": 1}}),
+                ("VideoLibrary.GetEpisodes", latest),
+            ]
+            keys = [None, "episodes"]
+        signature = []
+        for key, response in zip(keys, await self._query_kodi_batch(calls)):
+            result = response.get("result")
+            if not isinstance(result, dict):
+                return None
+            signature.append(result.get("limits", {}).get("total", 0))
+            if key is not None:
+                items = result.get(key) or [{}]
+                signature.append(items[0].get("dateadded"))
+        return signature
+
+    async def iter_movies(self) -> AsyncIterator[List[Movie]]:
+        """Stream the movies from Kodi, in batches parsed incrementally.
+
+        Raises:
+            CircuitOpenError: If Kodi is unavailable.
+            httpx.HTTPError: If the request fails.
+            ValueError: If the response is truncated or an error.
+        """
         params = {
             "properties": ["title", "year"],
         }
-        response = self._query_kodi("VideoLibrary.GetMovies", params)
-        movies = response.get("result", {}).get("movies", [])
-        list_of_movies = []
-        for movie in movies:
-            new_movie = Movie(
+        async for batch in self._stream_kodi(
+            "VideoLibrary.GetMovies",
+            params,
+            "movies",
+        ):
+            movies = [
+                Movie(
+                    title=movie.get("title", "Unknown"),
+                    year=movie.get("year", "N/A"),
+                    movie_id=movie.get("movieid"),
+                )
+                for movie in batch
+            ]
+            self.logger.debug("Retrieved %s movies", len(movies))
+            yield movies
+
+    async def get_movies(self) -> Optional[List[Movie]]:
+        """Get the list of movies from Kodi.
+
+        Returns:
+            The movies, or None if Kodi could not be queried.
+        """
+        with self.breaker.reporting("movies"):
+            list_of_movies = []
+            async for movies in self.iter_movies():
+                list_of_movies.extend(movies)
+            return list_of_movies
+        return None
+
+    async def get_movies_page(
+        self,
+        start: int,
+        end: int,
+    ) -> Tuple[List[Movie], int]:
+        """Get a page of movies from Kodi, sorted by title.
+
+        Returns:
+            The movies between `start` and `end`, and the total count.
+        """
+        params = {
+            "properties": ["title", "year"],
+            "limits": {"start": start, "end": end},
+            "sort": {"method": "title", "ignorearticle": True},
+        }
+        response = await self._query_kodi("VideoLibrary.GetMovies", params)
+        result = response.get("result", {})
+        movies = [
+            Movie(
                 title=movie.get("title", "Unknown"),
                 year=movie.get("year", "N/A"),
+                movie_id=movie.get("movieid"),
             )
-            list_of_movies.append(new_movie)
-            self.logger.debug("Retrieved movie: %s", new_movie.__dict__)
-        return list_of_movies
+            for movie in result.get("movies", [])
+        ]
+        return movies, result.get("limits", {}).get("total", len(movies))
 
-    def get_tv_shows(self) -> List[TVShow]:
-        """Get the list of TV shows, seasons and episodes count from Kodi."""
+    async def get_movie(self, movie_id: int) -> Optional[Movie]:
+        """Get a single movie from Kodi by its library id."""
         params = {
+            "movieid": movie_id,
             "properties": ["title", "year"],
         }
-        response = self._query_kodi("VideoLibrary.GetTVShows", params)
-        tv_shows = response.get("result", {}).get("tvshows", [])
-        list_of_tv_shows = []
+        response = await self._query_kodi(
+            "VideoLibrary.GetMovieDetails",
+            params,
+        )
+        movie = response.get("result", {}).get("moviedetails")
+        if movie is None:
+            return None
+        return Movie(
+            title=movie.get("title", "Unknown"),
+            year=movie.get("year", "N/A"),
+            movie_id=movie.get("movieid", movie_id),
+        )
 
-        for show in tv_shows:
-            new_show = TVShow(
+    async def iter_tv_shows(self) -> AsyncIterator[List[TVShow]]:
+        """Stream the TV shows from Kodi, without their seasons, in batches.
+
+        Raises:
+            CircuitOpenError: If Kodi is unavailable.
+            httpx.HTTPError: If the request fails.
+            ValueError: If the response is truncated or an error.
+        """
+        params = {
+            "properties": ["title", "year"],
+        }
+        async for batch in self._stream_kodi(
+            "VideoLibrary.GetTVShows",
+            params,
+            "tvshows",
+        ):
+            yield [
+                TVShow(
+                    title=show.get("title", "Unknown"),
+                    year=show.get("year", "N/A"),
+                    tvshow_id=show.get("tvshowid"),
+                )
+                for show in batch
+            ]
+
+    async def _get_seasons_by_show(self) -> Dict[int, Tuple[TVShowSeason, ...]]:
+        """Stream the seasons of all the TV shows, grouped by TV show."""
+        params = {
+            "properties": ["season", "episode", "tvshowid"],
+        }
+        seasons_by_show = defaultdict(list)
+        async for batch in self._stream_kodi(
+            "VideoLibrary.GetSeasons",
+            params,
+            "seasons",
+        ):
+            for season in batch:
+                seasons_by_show[season.get("tvshowid")].append(
+                    TVShowSeason(
+                        season_number=season.get("season", "Unknown"),
+                        episode_count=season.get("episode", "N/A"),
+                    ),
+                )
+        return {
+            show_id: tuple(show_seasons)
+            for show_id, show_seasons in seasons_by_show.items()
+        }
+
+    async def get_tv_shows(self) -> Optional[List[TVShow]]:
+        """Get the list of TV shows, seasons and episodes count from Kodi.
+
+        Seasons for all the TV shows are streamed with a single
+        `VideoLibrary.GetSeasons` call, concurrently with the TV shows one,
+        and grouped by TV show on the client side.
+
+        Returns:
+            The TV shows, or None if Kodi could not be queried.
+        """
+
+        async def collect_tv_shows() -> List[TVShow]:
+            return [
+                show async for shows in self.iter_tv_shows() for show in shows
+            ]
+
+        with self.breaker.reporting("TV shows"):
+            list_of_tv_shows, seasons_by_show = await asyncio.gather(
+                collect_tv_shows(),
+                self._get_seasons_by_show(),
+            )
+            for show in list_of_tv_shows:
+                show.seasons = seasons_by_show.get(show.tvshow_id, ())
+            self.logger.debug(
+                "Retrieved %s TV shows with %s seasons",
+                len(list_of_tv_shows),
+                sum(len(seasons) for seasons in seasons_by_show.values()),
+            )
+            return list_of_tv_shows
+        return None
+
+    async def get_tv_shows_page(
+        self,
+        start: int,
+        end: int,
+    ) -> Tuple[List[TVShow], int]:
+        """Get a page of TV shows with their seasons from Kodi.
+
+        The seasons of the TV shows in the page are requested
+        in a single JSON-RPC batch.
+
+        Returns:
+            The TV shows between `start` and `end`, and the total count.
+        """
+        params = {
+            "properties": ["title", "year"],
+            "limits": {"start": start, "end": end},
+            "sort": {"method": "title", "ignorearticle": True},
+        }
+        response = await self._query_kodi("VideoLibrary.GetTVShows", params)
+        result = response.get("result", {})
+        tv_shows = [
+            TVShow(
                 title=show.get("title", "Unknown"),
                 year=show.get("year", "N/A"),
+                tvshow_id=show.get("tvshowid"),
             )
-            params = {
-                "tvshowid": int(show["tvshowid"]),
-                "properties": ["season", "episode"],
-            }
-            data = self._query_kodi("VideoLibrary.GetSeasons", params)
-            seasons = data.get("result", {}).get("seasons", [])
-
-            for season in seasons:
-                new_season = TVShowSeason(
+            for show in result.get("tvshows", [])
+        ]
+        responses = await self._query_kodi_batch(
+            [
+                (
+                    "VideoLibrary.GetSeasons",
+                    {
+                        "tvshowid": show.tvshow_id,
+                        "properties": ["season", "episode"],
+                    },
+                )
+                for show in tv_shows
+            ],
+        )
+        for show, data in zip(tv_shows, responses):
+            show.seasons = tuple(
+                TVShowSeason(
                     season_number=season.get("season", "Unknown"),
                     episode_count=season.get("episode", "N/A"),
                 )
-                new_show.seasons.append(new_season)
-            self.logger.debug("Retrieved TV show: %s", new_show.__dict__)
-            list_of_tv_shows.append(new_show)
+                for season in data.get("result", {}).get("seasons", [])
+            )
+        return tv_shows, result.get("limits", {}).get("total", len(tv_shows))
+
+
+class KodiNotifications:
+    """Listener for the notifications sent by Kodi over its TCP channel.
+
+    Kodi pushes JSON-RPC notifications (e.g. `VideoLibrary.OnUpdate`)
+    to every client connected to its raw TCP port.
+    Callbacks can subscribe to a notification method and are awaited,
+    in order, with the notification data.
+    The listener reconnects with backoff when the connection is lost.
+    """
+
+    def __init__(self, kodi_config, logger):
+        """Initialize the KodiNotifications class with the given configuration."""  # noqa: E501
+        self.config = kodi_config
+        self.logger = logger
+        self.connected = False
+        self.generation = 0
+        self._callbacks: Dict[
+            str,
+            List[Callable[[dict], Awaitable[None]]],
+        ] = defaultdict(list)
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(
+        self,
+        method: str,
+        callback: Callable[[dict], Awaitable[None]],
+    ) -> None:
+        """Subscribe a coroutine callback to a Kodi notification method."""
+        self._callbacks[method].append(callback)
+
+    def start(self) -> None:
+        """Start listening for notifications, if not already listening."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop listening for notifications."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Keep a connection to Kodi open and dispatch notifications."""
+        delay = 1
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(
+                    self.config.ip,
+                    self.config.tcp_port,
+                )
+            except OSError as e:
+                self.logger.debug(
+                    "Kodi notifications unavailable, retrying in %ss: %s",
+                    delay,
+                    e,
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+                continue
+
+            delay = 1
+            self.generation += 1
+            self.connected = True
+            self.logger.debug("Listening for Kodi notifications")
+            try:
+                await self._read(reader)
+            except OSError as e:
+                self.logger.debug("Kodi notifications connection lost: %s", e)
+            finally:
+                self.connected = False
+                writer.close()
 
-        return list_of_tv_shows
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        """Decode the concatenated JSON messages sent by Kodi."""
+        decoder = json.JSONDecoder()
+        utf8 = codecs.getincrementaldecoder("utf-8")()
+        buffer = ""
+        while chunk := await reader.read(65536):
+            buffer += utf8.decode(chunk)
+            while buffer:
+                buffer = buffer.lstrip()
+                try:
+                    message, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    break
+                buffer = buffer[end:]
+                await self._dispatch(message)
+
+    async def _dispatch(self, message: dict) -> None:
+        """Await the callbacks subscribed to the notification method."""
+        method = message.get("method")
+        data = message.get("params", {}).get("data") or {}
+        for callback in self._callbacks.get(method, []):
+            try:
+                await callback(data)
+            except Exception as e:
+                self.logger.error(
+                    "Error handling Kodi notification %s: %s",
+                    method,
+                    e,
+                )
@@ -0,0 +1,436 @@
+"""In-memory cache of the Kodi library."""
+
+import asyncio
+import bisect
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.kodi import KodiClient, KodiNotifications
+from src.models import Movie, TVShow
+from src.search import SearchIndex
+from src.snapshot import LibrarySnapshot
+
+# The leading articles ignored by the title sort of Kodi
+SORT_ARTICLES = ("the ", "a ", "an ")
+
+
+def sort_title(title) -> str:
+    """Return the key sorting a title as Kodi does, ignoring its article.
+
+    The pages fetched from Kodi are sorted with `ignorearticle`, so the
+    pages sliced from the cache must be too, or a listing continued from
+    the cache would skip or repeat items (e.g. "The Matrix" under M).
+    """
+    key = str(title).casefold()
+    for article in SORT_ARTICLES:
+        if key.startswith(article):
+            return key[len(article) :]
+    return key
+
+
+class LibraryCache:
+    """Cache of the Kodi library kept up to date by Kodi notifications.
+
+    Movies and TV shows are fetched once and kept in memory.
+    While the notifications channel is connected, the cache is patched
+    or invalidated when Kodi reports a library change.
+    When the channel is unavailable, cached data expires after the TTL.
+
+    While Kodi is unavailable, the cached data is served even if stale.
+
+    With a snapshot, the library fetched from Kodi is also saved on disk.
+    After a restart, the snapshot is loaded on first use and served
+    right away, while it is revalidated against Kodi in the background.
+
+    Every change of the cached items bumps the version of their kind,
+    recording the first position of the sorted listing that changed,
+    so the pages rendered before that position can be kept.
+    """
+
+    MAX_CHANGES = 64
+
+    def __init__(
+        self,
+        kodi_client: KodiClient,
+        notifications: KodiNotifications,
+        logger,
+        snapshot: Optional[LibrarySnapshot] = None,
+    ):
+        """Initialize the LibraryCache class with the given Kodi client."""
+        self.kodi_client = kodi_client
+        self.notifications = notifications
+        self.logger = logger
+        self.snapshot = snapshot
+        self.ttl = kodi_client.config.cache_ttl
+        self._movies: Optional[Dict[int, Movie]] = None
+        self._tv_shows: Optional[Dict[int, TVShow]] = None
+        self._fetched_at: Dict[str, float] = {}
+        self._generation: Dict[str, int] = {}
+        self._sorted: Dict[str, list] = {}
+        self._locks = {"movie": asyncio.Lock(), "tvshow": asyncio.Lock()}
+        self._warmers: Dict[str, asyncio.Task] = {}
+        self._restored: set = set()
+        self._unindexed: set = set()
+        self._snapshot_tasks: set = set()
+        self._versions = {"movie": 0, "tvshow": 0}
+        self._changes: Dict[str, List[Tuple[int, int]]] = {
+            "movie": [],
+            "tvshow": [],
+        }
+        self.index = SearchIndex()
+
+        notifications.subscribe("VideoLibrary.OnUpdate", self._on_update)
+        notifications.subscribe("VideoLibrary.OnRemove", self._on_remove)
+        notifications.subscribe("VideoLibrary.OnScanFinished", self._on_scan)
+        notifications.subscribe("VideoLibrary.OnCleanFinished", self._on_scan)
+
+    def _is_fresh(self, kind: str) -> bool:
+        """Check if the cached data of the given kind can still be used."""
+        if kind not in self._fetched_at:
+            return False
+        if (
+            self.notifications.connected
+            and self._generation[kind] == self.notifications.generation
+        ):
+            return True
+        return time.monotonic() - self._fetched_at[kind] < self.ttl
+
+    def _mark_fetched(self, kind: str) -> None:
+        """Record when the data of the given kind was fetched from Kodi."""
+        self._fetched_at[kind] = time.monotonic()
+        self._generation[kind] = self.notifications.generation
+        self._sorted.pop(kind, None)
+
+    def _sorted_items(self, kind: str) -> list:
+        """Get the cached items of the given kind sorted by title."""
+        if kind not in self._sorted:
+            items = self._movies if kind == "movie" else self._tv_shows
+            self._sorted[kind] = sorted(
+                items.values(),
+                key=lambda item: sort_title(item.title),
+            )
+        return self._sorted[kind]
+
+    def _position(self, kind: str, *items) -> int:
+        """Get the first position of some items in the sorted listing."""
+        listing = self._sorted_items(kind)
+        return min(
+            bisect.bisect_left(
+                listing,
+                sort_title(item.title),
+                key=lambda listed: sort_title(listed.title),
+            )
+            for item in items
+            if item is not None
+        )
+
+    def _changed(self, kind: str, position: int = 0) -> None:
+        """Bump the version of a kind, changed from the given position."""
+        self._versions[kind] += 1
+        changes = self._changes[kind]
+        changes.append((self._versions[kind], position))
+        del changes[: -self.MAX_CHANGES]
+
+    def page_version(self, kind: str) -> Optional[int]:
+        """Get the version of the pages of a kind served from the cache.
+
+        Returns:
+            The version, or None if the pages are fetched from Kodi.
+        """
+        items = self._movies if kind == "movie" else self._tv_shows
+        if items is not None and (
+            self._is_fresh(kind) or not self.kodi_client.available
+        ):
+            return self._versions[kind]
+        return None
+
+    def count(self, kind: str) -> int:
+        """Get the number of cached items of a kind."""
+        items = self._movies if kind == "movie" else self._tv_shows
+        return len(items or ())
+
+    def changed_from(self, kind: str, version: int) -> int:
+        """Get the first position changed since a version of a kind.
+
+        Returns:
+            The position, 0 if the changes are too old to be known.
+        """
+        changes = self._changes[kind]
+        if version == self._versions[kind]:
+            return self.count(kind)
+        if not changes or changes[0][0] > version + 1:
+            return 0
+        return min(
+            position for changed, position in changes if changed > version
+        )
+
+    def _warm_up(self, kind: str, fetch) -> None:
+        """Fill the cache of the given kind in the background."""
+        task = self._warmers.get(kind)
+        if task is None or task.done():
+            self._warmers[kind] = asyncio.create_task(fetch())
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """Drop the cached data of the given kind, or all of it."""
+        for key in [kind] if kind else ["movie", "tvshow"]:
+            self._fetched_at.pop(key, None)
+        self.logger.debug("Library cache invalidated: %s", kind or "all")
+
+    async def _restore(self, kind: str) -> None:
+        """Load the snapshot of the given kind, once, if nothing is cached.
+
+        The restored items are served as fresh while they are revalidated
+        against Kodi in the background.
+        """
+        if self.snapshot is None or kind in self._restored:
+            return
+        async with self._locks[kind]:
+            if kind in self._restored:
+                return
+            self._restored.add(kind)
+            load = (
+                self.snapshot.load_movies
+                if kind == "movie"
+                else self.snapshot.load_tv_shows
+            )
+            try:
+                loaded = await asyncio.to_thread(load)
+            except sqlite3.Error as e:
+                self.logger.warning("Error loading library snapshot: %s", e)
+                return
+            if loaded is None:
+                return
+            items, signature = loaded
+            if kind == "movie":
+                self._movies = items
+            else:
+                self._tv_shows = items
+            self._unindexed.add(kind)
+            self._mark_fetched(kind)
+            self._changed(kind)
+            self._in_background(self._revalidate(kind, signature))
+
+    async def _revalidate(self, kind: str, signature: list) -> None:
+        """Check a restored snapshot against Kodi, refetching if it changed."""
+        current = await self.kodi_client.get_library_signature(kind)
+        if current is None:
+            self.logger.info("Kodi unavailable, serving the library snapshot")
+        elif current == signature:
+            self.logger.debug("Library snapshot of %s is up to date", kind)
+            self._mark_fetched(kind)
+        else:
+            self.logger.info("Library snapshot of %s is outdated", kind)
+            self.invalidate(kind)
+            if kind == "movie":
+                await self._ensure_movies()
+            else:
+                await self._ensure_tv_shows()
+
+    def _in_background(self, coro) -> None:
+        """Run a snapshot task in the background, keeping a reference."""
+        task = asyncio.create_task(coro)
+        self._snapshot_tasks.add(task)
+        task.add_done_callback(self._snapshot_tasks.discard)
+
+    async def _save(self, kind: str, signature: Optional[list]) -> None:
+        """Save the cached items of the given kind to the snapshot.
+
+        Nothing is saved when the signature could not be fetched,
+        or does not match the items (e.g. Kodi failed to list them),
+        so that a good snapshot is never replaced by a partial one.
+        """
+        items = self._movies if kind == "movie" else self._tv_shows
+        if (
+            self.snapshot is None
+            or items is None
+            or signature is None
+            or signature[0] != len(items)
+        ):
+            return
+        save = (
+            self.snapshot.save_movies
+            if kind == "movie"
+            else self.snapshot.save_tv_shows
+        )
+        try:
+            await asyncio.to_thread(save, list(items.values()), signature)
+        except sqlite3.Error as e:
+            self.logger.warning("Error saving library snapshot: %s", e)
+        else:
+            self.logger.debug("Library snapshot of %s saved", kind)
+
+    async def _save_later(self, kind: str) -> None:
+        """Save the items of a kind patched from a Kodi notification."""
+        if self.snapshot is not None:
+            signature = await self.kodi_client.get_library_signature(kind)
+            await self._save(kind, signature)
+
+    async def _ensure_movies(self) -> Dict[int, Movie]:
+        """Fetch the movies from Kodi if the cached ones are not fresh."""
+        self.notifications.start()
+        await self._restore("movie")
+        async with self._locks["movie"]:
+            if self._movies is None or not self._is_fresh("movie"):
+                signature, movies = await asyncio.gather(
+                    self._signature("movie"),
+                    self.kodi_client.get_movies(),
+                )
+                if movies is not None:
+                    self._movies = {movie.movie_id: movie for movie in movies}
+                    self._unindexed.add("movie")
+                    self._mark_fetched("movie")
+                    self._changed("movie")
+                    self._in_background(self._save("movie", signature))
+                elif self._movies is None:
+                    self._movies = {}
+        return self._movies
+
+    async def _ensure_tv_shows(self) -> Dict[int, TVShow]:
+        """Fetch the TV shows from Kodi if the cached ones are not fresh."""
+        self.notifications.start()
+        await self._restore("tvshow")
+        async with self._locks["tvshow"]:
+            if self._tv_shows is None or not self._is_fresh("tvshow"):
+                signature, shows = await asyncio.gather(
+                    self._signature("tvshow"),
+                    self.kodi_client.get_tv_shows(),
+                )
+                if shows is not None:
+                    self._tv_shows = {show.tvshow_id: show for show in shows}
+                    self._unindexed.add("tvshow")
+                    self._mark_fetched("tvshow")
+                    self._changed("tvshow")
+                    self._in_background(self._save("tvshow", signature))
+                elif self._tv_shows is None:
+                    self._tv_shows = {}
+        return self._tv_shows
+
+    async def _signature(self, kind: str) -> Optional[list]:
+        """Get the library signature of a kind, only if it will be saved."""
+        if self.snapshot is None:
+            return None
+        return await self.kodi_client.get_library_signature(kind)
+
+    async def get_movies(self) -> List[Movie]:
+        """Get the list of movies, fetching it from Kodi if needed."""
+        return list((await self._ensure_movies()).values())
+
+    async def get_tv_shows(self) -> List[TVShow]:
+        """Get the list of TV shows, fetching it from Kodi if needed."""
+        return list((await self._ensure_tv_shows()).values())
+
+    async def search(self, query: str, limit: int = 25) -> list:
+        """Search movies and TV shows by title.
+
+        The search index of freshly fetched items is built here, on first
+        use, so that fetching or restoring the library stays fast.
+
+        Returns:
+            The matching Movie and TVShow items, best matches first.
+        """
+        await asyncio.gather(self._ensure_movies(), self._ensure_tv_shows())
+        for kind in list(self._unindexed):
+            items = self._movies if kind == "movie" else self._tv_shows
+            self.index.sync(kind, items.items())
+            self._unindexed.discard(kind)
+        return self.index.search(query, limit)
+
+    async def get_movies_page(
+        self,
+        start: int,
+        end: int,
+    ) -> Tuple[List[Movie], int]:
+        """Get a page of movies sorted by title, and the total count.
+
+        The page is sliced from the cache when it is fresh, or when Kodi
+        is unavailable, otherwise only the page is fetched from Kodi
+        while the cache is warmed up in the background.
+        """
+        await self._restore("movie")
+        if self._movies is not None and (
+            self._is_fresh("movie") or not self.kodi_client.available
+        ):
+            movies = self._sorted_items("movie")
+            return movies[start:end], len(movies)
+        self._warm_up("movie", self._ensure_movies)
+        movies, total = await self.kodi_client.get_movies_page(start, end)
+        if not total and self._movies:
+            # Kodi did not answer: the stale cache is better than nothing.
+            movies = self._sorted_items("movie")
+            return movies[start:end], len(movies)
+        return movies, total
+
+    async def get_tv_shows_page(
+        self,
+        start: int,
+        end: int,
+    ) -> Tuple[List[TVShow], int]:
+        """Get a page of TV shows sorted by title, and the total count.
+
+        The page is sliced from the cache when it is fresh, or when Kodi
+        is unavailable, otherwise only the page is fetched from Kodi
+        while the cache is warmed up in the background.
+        """
+        await self._restore("tvshow")
+        if self._tv_shows is not None and (
+            self._is_fresh("tvshow") or not self.kodi_client.available
+        ):
+            shows = self._sorted_items("tvshow")
+            return shows[start:end], len(shows)
+        self._warm_up("tvshow", self._ensure_tv_shows)
+        shows, total = await self.kodi_client.get_tv_shows_page(start, end)
+        if not total and self._tv_shows:
+            # Kodi did not answer: the stale cache is better than nothing.
+            shows = self._sorted_items("tvshow")
+            return shows[start:end], len(shows)
+        return shows, total
+
+    async def _on_update(self, data: dict) -> None:
+        """Patch the cache when an item is added or updated in Kodi."""
+        item = data.get("item", {})
+        if item.get("type") == "movie":
+            if self._movies is None:
+                return
+            movie = await self.kodi_client.get_movie(item["id"])
+            if movie is None:
+                self.invalidate("movie")
+            else:
+                position = self._position(
+                    "movie",
+                    self._movies.get(movie.movie_id),
+                    movie,
+                )
+                self._movies[movie.movie_id] = movie
+                self._sorted.pop("movie", None)
+                self._changed("movie", position)
+                self.index.add(("movie", movie.movie_id), movie)
+                self.logger.debug("Library cache updated: %s", movie)
+                self._in_background(self._save_later("movie"))
+        elif item.get("type") in ("tvshow", "season", "episode"):
+            self.invalidate("tvshow")
+
+    async def _on_remove(self, data: dict) -> None:
+        """Patch the cache when an item is removed from Kodi."""
+        if data.get("type") == "movie" and self._movies is not None:
+            removed = self._movies.get(data.get("id"))
+            if removed is not None:
+                self._changed("movie", self._position("movie", removed))
+            self._movies.pop(data.get("id"), None)
+            self._sorted.pop("movie", None)
+            self.index.remove(("movie", data.get("id")))
+            self._in_background(self._save_later("movie"))
+        elif data.get("type") == "tvshow" and self._tv_shows is not None:
+            removed = self._tv_shows.get(data.get("id"))
+            if removed is not None:
+                self._changed("tvshow", self._position("tvshow", removed))
+            self._tv_shows.pop(data.get("id"), None)
+            self._sorted.pop("tvshow", None)
+            self.index.remove(("tvshow", data.get("id")))
+            self._in_background(self._save_later("tvshow"))
+        elif data.get("type") in ("season", "episode"):
+            self.invalidate("tvshow")
+
+    async def _on_scan(self, _data: dict) -> None:
+        """Invalidate the whole cache when a scan or clean finishes."""
+        self.invalidate()
@@ -0,0 +1,71 @@
+"""Locks serializing the operations on the same resource."""
+
+import asyncio
+import contextlib
+from typing import AsyncIterator, Dict, Set
+
+
+class KeyedLocks:
+    """Registry of locks created on demand for the resources named by a key.
+
+    Updates are processed concurrently, so operations on independent
+    resources run in parallel, while the ones sharing a key
+    (e.g. a torrent id, a media path or a backend) run one at a time.
+    A lock is forgotten as soon as nobody holds or waits for it.
+    """
+
+    def __init__(self):
+        """Initialize the KeyedLocks class."""
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+        self._claimed: Set[str] = set()
+
+    def locked(self, key: str) -> bool:
+        """Check if an operation on the resource is in progress."""
+        lock = self._locks.get(key)
+        return lock is not None and lock.locked()
+
+    def claim(self, key: str) -> bool:
+        """Claim a resource for an operation, unless it is already claimed.
+
+        The claim is taken without awaiting anything, so of concurrent
+        operations on the same resource (e.g. a double tap on a button)
+        only the first one gets it. It is given back with `release`.
+
+        Returns:
+            True if the resource was claimed, False if it is busy.
+        """
+        if key in self._claimed or self.locked(key):
+            return False
+        self._claimed.add(key)
+        return True
+
+    def release(self, key: str) -> None:
+        """Give back a resource claimed with `claim`."""
+        self._claimed.discard(key)
+
+    @contextlib.asynccontextmanager
+    async def hold(self, *keys: str) -> AsyncIterator[None]:
+        """Hold the locks of all the given keys.
+
+        The locks are always acquired in the same order,
+        so operations sharing several keys cannot deadlock.
+        """
+        keys = sorted(set(keys))
+        for key in keys:
+            self._locks.setdefault(key, asyncio.Lock())
+            self._users[key] = self._users.get(key, 0) + 1
+        acquired = []
+        try:
+            for key in keys:
+                await self._locks[key].acquire()
+                acquired.append(key)
+            yield
+        finally:
+            for key in reversed(acquired):
+                self._locks[key].release()
+            for key in keys:
+                self._users[key] -= 1
+                if not self._users[key]:
+                    del self._users[key]
+                    del self._locks[key]
@@ -0,0 +1,128 @@
+"""Non-blocking logging pipeline of the Telegram bot application."""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import time
+from typing import Dict, Optional, Tuple
+
+from src.metrics import metrics
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """Format the records as JSON lines, e.g. for journald or Loki."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a record as a single JSON object."""
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a sample of the debug records logged in a burst.
+
+    Up to `burst` debug records of each message template are kept per
+    `interval` seconds, e.g. one per request or per library item.
+    The next record of a template reports how many were dropped.
+    Records of higher levels are always kept.
+    """
+
+    def __init__(self, burst: int = 20, interval: float = 10.0):
+        """Initialize the SamplingFilter class."""
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows: Dict[Tuple[str, object], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Check if a record is kept, counting the dropped ones."""
+        if record.levelno > logging.DEBUG:
+            return True
+        now = time.monotonic()
+        key = (record.name, record.msg)
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= self.interval:
+            dropped = window[2] if window is not None else 0
+            self._windows[key] = [now, 1, 0]
+            if dropped:
+                record.msg = f"{record.msg} (and {dropped} similar dropped)"
+            return True
+        if window[1] < self.burst:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler leaving the formatting to the background writer.
+
+    Logging a record only appends it to a bounded queue, so it never
+    blocks the event loop: the records are formatted and written by the
+    thread of a QueueListener, and dropped when the queue is full.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Enqueue the record as is, it is formatted by the writer."""
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Enqueue a record, dropping it if the writer is behind."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log_records_dropped_total")
+
+
+def configure_logging(
+    name: str,
+    level: int,
+    log_format: str = "text",
+    levels: Optional[Dict[str, str]] = None,
+    max_queued: int = 10000,
+) -> logging.Logger:
+    """Send the logs to the standard error through a background writer.
+
+    Args:
+        name: Name of the logger of the application.
+        level: Level of the logger of the application.
+        log_format: "json" for JSON lines, otherwise plain text.
+        levels: Levels of other loggers, by name (e.g. "httpx": "WARNING").
+        max_queued: Maximum number of records waiting to be written.
+
+    Returns:
+        The logger of the application.
+    """
+    stream = logging.StreamHandler()
+    if log_format == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handler = BackgroundQueueHandler(queue.Queue(max_queued))
+    handler.addFilter(SamplingFilter())
+    listener = logging.handlers.QueueListener(
+        handler.queue,
+        stream,
+        respect_handler_level=True,
+    )
+    listener.start()
+    atexit.register(listener.stop)
+
+    # Attached to the root logger, so the libraries go through it as well
+    logging.getLogger().addHandler(handler)
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    for logger_name, logger_level in (levels or {}).items():
+        logging.getLogger(logger_name).setLevel(logger_level.upper())
+    return logger
@@ -0,0 +1,242 @@
+"""Low overhead metrics of the bot: counters, gauges and latency histograms."""
+
+import asyncio
+import bisect
+import contextlib
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, in seconds."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """Initialize an empty Histogram with the given bucket bounds."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record a value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile, interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = (
+                    self.buckets[index]
+                    if index < len(self.buckets)
+                    else self.max
+                )
+                value = lower + (upper - lower) * (rank - seen) / count
+                return min(value, self.max)
+            seen += count
+        return self.max
+
+
+class Metrics:
+    """Registry of the bot metrics, identified by name and labels."""
+
+    def __init__(self):
+        """Initialize an empty Metrics registry."""
+        self.counters: Dict[str, Dict[Labels, float]] = defaultdict(
+            lambda: defaultdict(float),
+        )
+        self.gauges: Dict[str, Dict[Labels, float]] = defaultdict(
+            lambda: defaultdict(float),
+        )
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = defaultdict(
+            lambda: defaultdict(Histogram),
+        )
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increment a counter."""
+        self.counters[name][tuple(sorted(labels.items()))] += value
+
+    def gauge(self, name: str, value: float, **labels) -> None:
+        """Add a value, possibly negative, to a gauge."""
+        self.gauges[name][tuple(sorted(labels.items()))] += value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a value in a histogram."""
+        self.histograms[name][tuple(sorted(labels.items()))].observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Measure a block: latency, requests in flight and errors.
+
+        Records the `<name>_seconds` histogram, the `<name>_in_flight`
+        gauge and the `<name>_errors_total` counter.
+        """
+        self.gauge(f"{name}_in_flight", 1, **labels)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(
+                f"{name}_seconds",
+                time.perf_counter() - start,
+                **labels,
+            )
+            self.gauge(f"{name}_in_flight", -1, **labels)
+
+    def summary(self) -> List[str]:
+        """Return a human readable summary of the metrics."""
+        lines = []
+        for name, series in sorted(self.histograms.items()):
+            for labels, histogram in sorted(series.items()):
+                lines.append(
+                    f"{name}{_format_labels(labels)}: "
+                    f"n={histogram.count} "
+                    f"avg={histogram.sum / histogram.count * 1000:.1f}ms "
+                    f"p50={histogram.quantile(0.5) * 1000:.1f}ms "
+                    f"p99={histogram.quantile(0.99) * 1000:.1f}ms "
+                    f"max={histogram.max * 1000:.1f}ms",
+                )
+        for kind in (self.counters, self.gauges):
+            for name, series in sorted(kind.items()):
+                lines.extend(
+                    f"{name}{_format_labels(labels)}: {value:g}"
+                    for labels, value in sorted(series.items())
+                )
+        return lines
+
+    def prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+        for kind, series_by_name in (
+            ("counter", self.counters),
+            ("gauge", self.gauges),
+        ):
+            for name, series in sorted(series_by_name.items()):
+                lines.append(f"# TYPE telegram_bot_{name} {kind}")
+                lines.extend(
+                    f"telegram_bot_{name}{_format_labels(labels)} {value:g}"
+                    for labels, value in sorted(series.items())
+                )
+        for name, series in sorted(self.histograms.items()):
+            lines.append(f"# TYPE telegram_bot_{name} histogram")
+            for labels, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(
+                    (*histogram.buckets, "+Inf"),
+                    histogram.counts,
+                ):
+                    cumulative += count
+                    bucket_labels = (*labels, ("le", str(bound)))
+                    lines.append(
+                        f"telegram_bot_{name}_bucket"
+                        f"{_format_labels(bucket_labels)} {cumulative}",
+                    )
+                lines.append(
+                    f"telegram_bot_{name}_sum{_format_labels(labels)} "
+                    f"{histogram.sum:g}",
+                )
+                lines.append(
+                    f"telegram_bot_{name}_count{_format_labels(labels)} "
+                    f"{histogram.count}",
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    """Format labels as `{name="value",...}`."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class MetricsServer:
+    """Minimal HTTP server exposing the metrics to Prometheus."""
+
+    def __init__(self, registry: Metrics, listen: str, port: int, logger):
+        """Initialize the MetricsServer class."""
+        self.registry = registry
+        self.listen = listen
+        self.port = port
+        self.logger = logger
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """Start serving the metrics."""
+        self._server = await asyncio.start_server(
+            self._handle,
+            self.listen,
+            self.port,
+        )
+        self.logger.info(
+            "Serving metrics on http://%s:%s/metrics",
+            self.listen,
+            self.port,
+        )
+
+    async def stop(self) -> None:
+        """Stop serving the metrics."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Answer a single HTTP request."""
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await reader.readline()).strip():
+                pass
+            if request.split()[1:2] == [b"/metrics"]:
+                status, body = "200 OK", self.registry.prometheus().encode()
+            else:
+                status, body = "404 Not Found", b""
+            headers = (
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+            writer.write(headers.encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, OSError) as e:
+            self.logger.debug("Error serving metrics: %s", e)
+        finally:
+            writer.close()
+
+
+metrics = Metrics()
@@ -1,13 +1,28 @@
-"""Models for my service."""
+"""Models for my service.
+
+The models use `__slots__` and interned titles, so a cached library of tens
+of thousands of titles stays small on a Raspberry Pi.
+"""
+
+import sys
 
 
 class Movie:
     """Class representing a movie."""
 
-    def __init__(self, title, year):
-        """Initialize the Movie class with the given title and year."""
-        self.title = title
+    __slots__ = ("title", "year", "movie_id")
+
+    def __init__(self, title, year, movie_id=None):
+        """Initialize the Movie class with the given title and year.
+
+        Args:
+            title: The title of the movie.
+            year: The release year of the movie.
+            movie_id: The Kodi library id of the movie, if known.
+        """
+        self.title = sys.intern(title) if isinstance(title, str) else title
         self.year = year
+        self.movie_id = movie_id
 
     def __repr__(self):
         """Return a string representation of the Movie instance."""
@@ -17,6 +32,8 @@ class Movie:
 class TVShowSeason:
     """Class representing a season of a TV show."""
 
+    __slots__ = ("season_number", "episode_count")
+
     def __init__(self, season_number, episode_count):
         """Initialize the TVShowSeason class.
 
@@ -38,11 +55,20 @@ class TVShowSeason:
 class TVShow:
     """Class representing a TV show."""
 
-    def __init__(self, title, year):
-        """Initialize the TVShow class with the given title and year."""
-        self.title = title
+    __slots__ = ("title", "year", "tvshow_id", "seasons")
+
+    def __init__(self, title, year, tvshow_id=None):
+        """Initialize the TVShow class with the given title and year.
+
+        Args:
+            title: The title of the TV show.
+            year: The release year of the TV show.
+            tvshow_id: The Kodi library id of the TV show, if known.
+        """
+        self.title = sys.intern(title) if isinstance(title, str) else title
         self.year = year
-        self.seasons = []
+        self.tvshow_id = tvshow_id
+        self.seasons = ()
 
     def __repr__(self):
         """Return a string representation of the TVShow instance."""
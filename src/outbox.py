@@ -0,0 +1,328 @@
+"""Outgoing queue of the messages sent to Telegram."""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from telegram.constants import MessageLimit
+from telegram.error import RetryAfter
+
+from src.metrics import metrics
+
+INTERACTIVE = 0
+NOTIFICATION = 1
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` requests per second, in bursts."""
+
+    def __init__(self, rate: float, burst: int):
+        """Initialize a full TokenBucket with the given rate and burst."""
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last update."""
+        self.tokens = min(
+            self.burst,
+            self.tokens + (now - self.updated) * self.rate,
+        )
+        self.updated = now
+
+    def delay(self) -> float:
+        """Return the seconds to wait until a token is available."""
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self.paused_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def consume(self) -> None:
+        """Take a token from the bucket."""
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Hold the bucket empty for the given seconds."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class OutgoingRequest:
+    """A request waiting in the outbox, ordered by priority and arrival."""
+
+    def __init__(
+        self,
+        priority: int,
+        sequence: int,
+        chat_id,
+        request: Optional[Callable[[], Awaitable[Any]]] = None,
+        message: Optional[Dict[str, Any]] = None,
+    ):
+        """Initialize the OutgoingRequest class.
+
+        Args:
+            priority: INTERACTIVE or NOTIFICATION.
+            sequence: Arrival order, to keep requests of a chat in order.
+            chat_id: Chat the request is sent to.
+            request: Coroutine function performing the API call.
+            message: Arguments of `send_message`, when it is a plain message
+                that can be merged with the adjacent ones.
+        """
+        self.priority = priority
+        self.sequence = sequence
+        self.chat_id = chat_id
+        self.request = request
+        self.message = message
+        self.futures: List[asyncio.Future] = [
+            asyncio.get_running_loop().create_future(),
+        ]
+
+    def __lt__(self, other: "OutgoingRequest") -> bool:
+        """Order the requests by priority, then by arrival."""
+        return (self.priority, self.sequence) < (
+            other.priority,
+            other.sequence,
+        )
+
+    def can_merge(self, other: "OutgoingRequest") -> bool:
+        """Check if another message can be appended to this one."""
+        return (
+            self.message is not None
+            and other.message is not None
+            and self.priority == other.priority == NOTIFICATION
+            and self.chat_id == other.chat_id
+            and self.message.get("reply_markup") is None
+            and other.message.get("reply_markup") is None
+            and self.message.get("parse_mode")
+            == other.message.get("parse_mode")
+            and len(self.message["text"]) + len(other.message["text"]) + 2
+            <= MessageLimit.MAX_TEXT_LENGTH
+        )
+
+    def merge(self, other: "OutgoingRequest") -> None:
+        """Append another message to this one."""
+        self.message["text"] = (
+            f"{self.message['text']}\n\n{other.message['text']}"
+        )
+        self.futures.extend(other.futures)
+
+
+class Outbox:
+    """Central queue for every message sent to Telegram.
+
+    Requests are sent by priority, interactive replies before
+    notifications, within a global and a per-chat token bucket.
+    When Telegram answers with flood control, the chat is paused for
+    the `retry_after` seconds and the request is sent again.
+    Adjacent plain notifications to the same chat are merged.
+    """
+
+    def __init__(self, outbox_config, logger):
+        """Initialize the Outbox class with the given configuration."""
+        self.config = outbox_config
+        self.logger = logger
+        self.bot = None
+        self._queue: List[OutgoingRequest] = []
+        self._sequence = itertools.count()
+        self._global = TokenBucket(self.config.global_rate, self.config.burst)
+        self._chats: Dict[Any, TokenBucket] = {}
+        self._in_flight: set = set()
+        self._sending: set = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, bot) -> None:
+        """Start sending the queued requests with the given bot."""
+        self.bot = bot
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sending, failing the requests still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for item in self._queue:
+            for future in item.futures:
+                future.cancel()
+        self._queue.clear()
+
+    async def send_message(
+        self,
+        chat_id,
+        text: str,
+        priority: int = NOTIFICATION,
+        **kwargs,
+    ):
+        """Queue a message and wait until it is sent.
+
+        Returns:
+            The sent telegram.Message.
+        """
+        item = OutgoingRequest(
+            priority,
+            next(self._sequence),
+            chat_id,
+            message={"chat_id": chat_id, "text": text, **kwargs},
+        )
+        return await self._enqueue(item)
+
+    async def reply(self, update, text: str, **kwargs):
+        """Queue an interactive reply to the chat of an update."""
+        return await self.send_message(
+            update.effective_chat.id,
+            text,
+            priority=INTERACTIVE,
+            **kwargs,
+        )
+
+    async def call(
+        self,
+        chat_id,
+        request: Callable[[], Awaitable[Any]],
+        priority: int = INTERACTIVE,
+    ):
+        """Queue any other API call to a chat, e.g. a message edit.
+
+        Returns:
+            The result of the API call.
+        """
+        item = OutgoingRequest(
+            priority,
+            next(self._sequence),
+            chat_id,
+            request=request,
+        )
+        return await self._enqueue(item)
+
+    async def _enqueue(self, item: OutgoingRequest):
+        """Add a request to the queue and wait for its result."""
+        if self._task is None:
+            raise RuntimeError("Outbox is not started")
+        heapq.heappush(self._queue, item)
+        self._wakeup.set()
+        return await item.futures[0]
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        """Get the token bucket of a chat, creating it if needed."""
+        if chat_id not in self._chats:
+            if len(self._chats) >= self.config.max_chats:
+                self._evict_idle_chats()
+            self._chats[chat_id] = TokenBucket(
+                self.config.chat_rate,
+                self.config.burst,
+            )
+        return self._chats[chat_id]
+
+    def _evict_idle_chats(self) -> None:
+        """Forget the buckets of the chats that are back to a full bucket."""
+        for chat_id, bucket in list(self._chats.items()):
+            if chat_id not in self._in_flight and bucket.delay() == 0:
+                if bucket.tokens >= bucket.burst:
+                    del self._chats[chat_id]
+
+    async def _run(self) -> None:
+        """Send the queued requests as fast as the limits allow."""
+        while True:
+            item, wait = self._next_ready()
+            if item is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._merge_following(item)
+            self._global.consume()
+            self._chat_bucket(item.chat_id).consume()
+            self._in_flight.add(item.chat_id)
+            task = asyncio.create_task(self._send(item))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    def _next_ready(self):
+        """Pop the first request whose limits allow sending it now.
+
+        Returns:
+            The request, or None and the seconds to wait before retrying.
+        """
+        wait = self._global.delay()
+        if not self._queue or wait > 0:
+            return None, wait or None
+        blocked = set()
+        for item in sorted(self._queue):
+            if item.chat_id in self._in_flight or item.chat_id in blocked:
+                blocked.add(item.chat_id)
+                continue
+            delay = self._chat_bucket(item.chat_id).delay()
+            if delay == 0:
+                self._queue.remove(item)
+                heapq.heapify(self._queue)
+                return item, None
+            blocked.add(item.chat_id)
+            wait = delay if not wait else min(wait, delay)
+        return None, wait or None
+
+    def _merge_following(self, item: OutgoingRequest) -> None:
+        """Merge the queued messages that follow a request to its chat."""
+        following = sorted(
+            other for other in self._queue if other.chat_id == item.chat_id
+        )
+        merged = []
+        for other in following:
+            if not item.can_merge(other):
+                break
+            item.merge(other)
+            merged.append(other)
+        if merged:
+            for other in merged:
+                self._queue.remove(other)
+            heapq.heapify(self._queue)
+            self.logger.debug(
+                "Merged %s messages to chat %s",
+                len(merged) + 1,
+                item.chat_id,
+            )
+
+    async def _send(self, item: OutgoingRequest) -> None:
+        """Perform the API call of a request and resolve its futures."""
+        kind = "send_message" if item.message is not None else "call"
+        try:
+            with metrics.timer("telegram_request", kind=kind):
+                if item.message is not None:
+                    result = await self.bot.send_message(**item.message)
+                else:
+                    result = await item.request()
+        except RetryAfter as e:
+            metrics.inc("telegram_retry_after_total")
+            retry_after = e.retry_after
+            if not isinstance(retry_after, (int, float)):
+                retry_after = retry_after.total_seconds()
+            self.logger.warning(
+                "Flood control on chat %s, retrying in %ss",
+                item.chat_id,
+                retry_after,
+            )
+            self._chat_bucket(item.chat_id).pause(retry_after)
+            heapq.heappush(self._queue, item)
+        except Exception as e:
+            for future in item.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in item.futures:
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._in_flight.discard(item.chat_id)
+            self._wakeup.set()
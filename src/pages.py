@@ -0,0 +1,197 @@
+"""Rendering of the paged library listings sent to Telegram."""
+
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import MessageLimit
+from telegram.helpers import escape_markdown
+
+from src.metrics import metrics
+from src.models import Movie, TVShow
+
+PAGE_CALLBACK_PREFIX = "page"
+
+
+def page_count(total: int, page_size: int) -> int:
+    """Return the number of pages needed to list `total` items."""
+    return max(1, -(-total // page_size))
+
+
+def page_keyboard(
+    kind: str,
+    page: int,
+    pages: int,
+) -> Optional[InlineKeyboardMarkup]:
+    """Build the Prev/Next inline keyboard for a listing page.
+
+    The callback data of the buttons has following format:
+    "page|kind|page_number"
+    """
+    buttons = []
+    if page > 0:
+        buttons.append(
+            InlineKeyboardButton(
+                "⬅️ Prev",
+                callback_data=f"{PAGE_CALLBACK_PREFIX}|{kind}|{page - 1}",
+            ),
+        )
+    if page < pages - 1:
+        buttons.append(
+            InlineKeyboardButton(
+                "Next ➡️",
+                callback_data=f"{PAGE_CALLBACK_PREFIX}|{kind}|{page + 1}",
+            ),
+        )
+    return InlineKeyboardMarkup([buttons]) if buttons else None
+
+
+def fit_message(
+    text: str,
+    limit: int = MessageLimit.MAX_TEXT_LENGTH,
+) -> str:
+    """Cut a message at a line boundary to fit in a Telegram message."""
+    if len(text) <= limit:
+        return text
+    cut = text.rfind("\n", 0, limit - 2)
+    return f"{text[:cut]}\n…"
+
+
+def render_movies(
+    movies: List[Movie],
+    total: int,
+    page: int,
+    pages: int,
+) -> str:
+    """Render a page of movies as a Markdown message."""
+    lines = [f"🎬 *Movies in Kodi* ({total} total)", ""]
+    lines.extend(
+        f"🎥 *{escape_markdown(str(movie.title))}* ({movie.year})"
+        for movie in movies
+    )
+    if pages > 1:
+        lines.extend(["", f"Page {page + 1}/{pages}"])
+    return "\n".join(lines)
+
+
+def render_tv_shows(
+    shows: List[TVShow],
+    total: int,
+    page: int,
+    pages: int,
+) -> str:
+    """Render a page of TV shows and their seasons as a Markdown message."""
+    lines = [f"📺 *TV Shows in Kodi* ({total} total)", ""]
+    for show in shows:
+        lines.append(f"🎭 *{escape_markdown(str(show.title))}* ({show.year})")
+        if show.seasons:
+            lines.extend(
+                f"   └ Season {season.season_number}: "
+                f"{season.episode_count} episodes"
+                for season in show.seasons
+            )
+        else:
+            lines.append("   └ No seasons found")
+        lines.append("")
+    if pages > 1:
+        lines.append(f"Page {page + 1}/{pages}")
+    return "\n".join(lines)
+
+
+def render_search_results(query: str, results: list) -> str:
+    """Render the movies and TV shows matching a search as Markdown."""
+    if not results:
+        return f"🔍 No results for *{escape_markdown(query)}*"
+    lines = [f"🔍 *Results for* {escape_markdown(query)}", ""]
+    lines.extend(
+        f"{'🎥' if isinstance(item, Movie) else '🎭'} "
+        f"*{escape_markdown(str(item.title))}* ({item.year})"
+        for item in results
+    )
+    return "\n".join(lines)
+
+
+class RenderedPages:
+    """LRU cache of the rendered listing pages, bounded in count and bytes.
+
+    A page is cached with the version of the library it was rendered from.
+    It stays valid in later versions as long as the total is the same and
+    every change since its version starts after the end of the page.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int = 512):
+        """Initialize the RenderedPages class.
+
+        Args:
+            max_bytes: Maximum size of the cached texts, in bytes.
+            max_entries: Maximum number of cached pages.
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.size = 0
+        self._pages: OrderedDict = OrderedDict()
+
+    def get(
+        self,
+        key: Hashable,
+        version: int,
+        total: int,
+        end: int,
+        changed_from: Callable[[int], int],
+    ) -> Optional[Tuple[str, Optional[InlineKeyboardMarkup]]]:
+        """Get a cached page, if still valid.
+
+        Args:
+            key: The key of the page.
+            version: The current version of the library.
+            total: The current number of items in the library.
+            end: The position after the last item of the page.
+            changed_from: Returns the first position changed since
+                a version of the library.
+
+        Returns:
+            The Markdown text and the inline keyboard of the page,
+            or None if not cached.
+        """
+        entry = self._pages.get(key)
+        if entry is not None and entry[0] != version:
+            if entry[1] == total and changed_from(entry[0]) >= end:
+                entry[0] = version
+            else:
+                self._discard(key)
+                entry = None
+        if entry is None:
+            metrics.inc("render_cache_misses_total")
+            return None
+        self._pages.move_to_end(key)
+        metrics.inc("render_cache_hits_total")
+        return entry[2], entry[3]
+
+    def put(
+        self,
+        key: Hashable,
+        version: int,
+        total: int,
+        text: str,
+        keyboard: Optional[InlineKeyboardMarkup],
+    ) -> None:
+        """Cache a page, evicting the least recently used ones if needed."""
+        self._discard(key)
+        size = len(text.encode())
+        if size > self.max_bytes:
+            return
+        self._pages[key] = [version, total, text, keyboard, size]
+        self.size += size
+        while self.size > self.max_bytes or len(self._pages) > self.max_entries:
+            self._discard(next(iter(self._pages)))
+
+    def clear(self) -> None:
+        """Remove all the pages from the cache."""
+        self._pages.clear()
+        self.size = 0
+
+    def _discard(self, key: Hashable) -> None:
+        """Remove a page from the cache, if cached."""
+        entry = self._pages.pop(key, None)
+        if entry is not None:
+            self.size -= entry[4]
@@ -0,0 +1,110 @@
+"""Scheduler of the Kodi library scans."""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from src.kodi import KodiClient, KodiNotifications
+
+
+class ScanScheduler:
+    """Debounce, merge and scope the Kodi library scans.
+
+    Scan requests received within the debounce window are merged:
+    a full scan absorbs every other request, and a directory absorbs
+    its subdirectories. Kodi runs one scan at a time, so merged scans
+    are run one after the other, each one waiting for `OnScanFinished`.
+    """
+
+    def __init__(
+        self,
+        kodi_client: KodiClient,
+        notifications: KodiNotifications,
+        logger,
+    ):
+        """Initialize the ScanScheduler class with the given Kodi client."""
+        self.kodi_client = kodi_client
+        self.notifications = notifications
+        self.config = kodi_client.config
+        self.logger = logger
+        self._pending: Dict[Optional[str], List[asyncio.Future]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._finished = asyncio.Event()
+
+        notifications.subscribe(
+            "VideoLibrary.OnScanFinished",
+            self._on_scan_finished,
+        )
+
+    async def scan(self, directory: Optional[str] = None) -> bool:
+        """Request a scan of a directory, or of the whole library.
+
+        Returns:
+            True if Kodi reported the scan as finished,
+            False if it could not be confirmed.
+        """
+        self.notifications.start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(directory, []).append(future)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return await future
+
+    async def _run(self) -> None:
+        """Run the pending scans, batch after batch."""
+        while self._pending:
+            await asyncio.sleep(self.config.scan_debounce)
+            pending, self._pending = self._pending, {}
+            for directory, futures in self._merge(pending):
+                try:
+                    finished = await self._scan(directory)
+                except Exception as e:
+                    self.logger.error("Error scanning Kodi library: %s", e)
+                    finished = False
+                for future in futures:
+                    if not future.done():
+                        future.set_result(finished)
+
+    @staticmethod
+    def _merge(
+        pending: Dict[Optional[str], List[asyncio.Future]],
+    ) -> List[Tuple[Optional[str], List[asyncio.Future]]]:
+        """Merge the pending requests into the minimal list of scans."""
+        if None in pending:
+            everyone = [f for futures in pending.values() for f in futures]
+            return [(None, everyone)]
+        scans: List[Tuple[str, List[asyncio.Future]]] = []
+        for directory in sorted(pending):
+            if scans and directory.startswith(scans[-1][0]):
+                scans[-1][1].extend(pending[directory])
+            else:
+                scans.append((directory, list(pending[directory])))
+        return scans
+
+    async def _scan(self, directory: Optional[str]) -> bool:
+        """Run a single scan and wait for Kodi to finish it."""
+        self.logger.debug("Scanning Kodi library: %s", directory or "all")
+        self._finished.clear()
+        if not await self.kodi_client.refresh_library(directory):
+            return False
+        if not self.notifications.connected:
+            return False
+        try:
+            await asyncio.wait_for(
+                self._finished.wait(),
+                timeout=self.config.scan_timeout,
+            )
+        except asyncio.TimeoutError:
+            self.logger.warning("Kodi library scan did not finish in time")
+            return False
+        return True
+
+    async def _on_scan_finished(self, _data: dict) -> None:
+        """Wake up the scan waiting for Kodi to finish."""
+        self._finished.set()
+
+
+def source_directory(path: Optional[str]) -> Optional[str]:
+    """Return a Kodi source directory with the trailing separator it needs."""
+    if not path:
+        return None
+    return path if path.endswith("/") else f"{path}/"
@@ -0,0 +1,143 @@
+"""Search index over the titles of the Kodi library."""
+
+import heapq
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+NGRAM_SIZE = 3
+
+
+def fold(text: str) -> str:
+    """Fold a text for searching, removing accents, case and punctuation."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return " ".join(
+        "".join(
+            char if char.isalnum() else " "
+            for char in decomposed
+            if not unicodedata.combining(char)
+        )
+        .casefold()
+        .split(),
+    )
+
+
+def ngrams(text: str) -> Set[str]:
+    """Return the n-grams of a folded text.
+
+    Besides the n-grams, the shorter prefixes of every word are included,
+    so queries shorter than the n-gram size can still be looked up.
+    """
+    grams = {
+        text[index : index + NGRAM_SIZE]
+        for index in range(len(text) - NGRAM_SIZE + 1)
+    }
+    for word in text.split():
+        grams.update(word[:length] for length in range(1, NGRAM_SIZE))
+    return grams
+
+
+class SearchIndex:
+    """In-process n-gram index mapping folded titles to library items.
+
+    Items are identified by a hashable key, e.g. `("movie", movie_id)`,
+    and can be added, replaced or removed one by one,
+    so the index follows the library without being rebuilt.
+    """
+
+    def __init__(self):
+        """Initialize an empty SearchIndex."""
+        self._items: Dict[Hashable, object] = {}
+        self._titles: Dict[Hashable, str] = {}
+        self._postings: Dict[str, Set[Hashable]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        """Return the number of indexed items."""
+        return len(self._items)
+
+    def add(self, key: Hashable, item) -> None:
+        """Index an item by its title, replacing any item with the same key."""
+        title = fold(item.title)
+        if self._titles.get(key) == title:
+            self._items[key] = item
+            return
+        self.remove(key)
+        self._items[key] = item
+        self._titles[key] = title
+        for gram in ngrams(title):
+            self._postings[gram].add(key)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove an item from the index, if present."""
+        title = self._titles.pop(key, None)
+        self._items.pop(key, None)
+        if title is None:
+            return
+        for gram in ngrams(title):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def sync(
+        self,
+        kind: str,
+        items: Iterable[Tuple[Hashable, object]],
+    ) -> None:
+        """Make the indexed items of a kind match the given (id, item) pairs.
+
+        Only added, renamed and removed items touch the n-gram postings.
+        """
+        current = {key for key in self._items if key[0] == kind}
+        for item_id, item in items:
+            key = (kind, item_id)
+            current.discard(key)
+            self.add(key, item)
+        for key in current:
+            self.remove(key)
+
+    def search(self, query: str, limit: int = 25) -> List:
+        """Return the items whose title contains every word of the query.
+
+        Items whose title starts with the query are ranked first.
+        """
+        folded = fold(query)
+        if not folded:
+            return []
+        words = folded.split()
+        grams = sorted(
+            (self._postings.get(gram, set()) for gram in self._query(folded)),
+            key=len,
+        )
+        candidates = set.intersection(*grams) if grams else set()
+        matches = heapq.nsmallest(
+            limit,
+            (
+                key
+                for key in candidates
+                if all(word in self._titles[key] for word in words)
+            ),
+            key=lambda key: (
+                not self._titles[key].startswith(folded),
+                self._titles[key],
+            ),
+        )
+        return [self._items[key] for key in matches]
+
+    @staticmethod
+    def _query(folded: str) -> Set[str]:
+        """Return the n-grams to look up for a folded query.
+
+        Words shorter than the n-gram size are looked up as word prefixes.
+        """
+        grams = set()
+        for word in folded.split():
+            if len(word) < NGRAM_SIZE:
+                grams.add(word)
+            else:
+                grams.update(
+                    word[index : index + NGRAM_SIZE]
+                    for index in range(len(word) - NGRAM_SIZE + 1)
+                )
+        return grams
@@ -0,0 +1,159 @@
+"""Persistent snapshot of the Kodi library, for instant warm starts."""
+
+import json
+import sqlite3
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.models import Movie, TVShow, TVShowSeason
+
+SNAPSHOT_VERSION = 1
+
+
+class LibrarySnapshot:
+    """SQLite snapshot of the cached movies and TV shows.
+
+    Each kind of item is saved with the signature of the Kodi library
+    it was fetched from (e.g. item count and last date added), so that
+    after a restart the snapshot can be served right away
+    and revalidated against Kodi with a cheap query.
+    Every call opens its own connection, so it can run in a worker thread.
+    """
+
+    def __init__(self, path: str, logger):
+        """Initialize the LibrarySnapshot class.
+
+        Args:
+            path: Path of the SQLite database file.
+            logger: Logger instance.
+        """
+        self.path = path
+        self.logger = logger
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the database, creating the tables if needed."""
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute("PRAGMA journal_mode=WAL")
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS library_snapshot ("
+                "kind TEXT PRIMARY KEY, "
+                "version INTEGER NOT NULL, "
+                "signature TEXT NOT NULL, "
+                "saved_at REAL NOT NULL)",
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS library_movies ("
+                "movie_id INTEGER PRIMARY KEY, "
+                "title TEXT, "
+                "year)",
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS library_tv_shows ("
+                "tvshow_id INTEGER PRIMARY KEY, "
+                "title TEXT, "
+                "year, "
+                "seasons TEXT NOT NULL)",
+            )
+        return connection
+
+    def _signature(self, connection, kind: str) -> Optional[list]:
+        """Get the saved signature of a kind, if saved by this version."""
+        row = connection.execute(
+            "SELECT signature FROM library_snapshot "
+            "WHERE kind = ? AND version = ?",
+            (kind, SNAPSHOT_VERSION),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save(self, connection, kind: str, signature: list) -> None:
+        """Record the signature of a kind that has just been saved."""
+        connection.execute(
+            "INSERT OR REPLACE INTO library_snapshot VALUES (?, ?, ?, ?)",
+            (kind, SNAPSHOT_VERSION, json.dumps(signature), time.time()),
+        )
+
+    def load_movies(self) -> Optional[Tuple[Dict[int, Movie], list]]:
+        """Load the saved movies, keyed by id, and their signature."""
+        connection = self._connect()
+        try:
+            signature = self._signature(connection, "movie")
+            if signature is None:
+                return None
+            movies = {
+                movie_id: Movie(title, year, movie_id)
+                for movie_id, title, year in connection.execute(
+                    "SELECT movie_id, title, year FROM library_movies",
+                )
+            }
+        finally:
+            connection.close()
+        self.logger.debug("Loaded %s movies from the snapshot", len(movies))
+        return movies, signature
+
+    def save_movies(self, movies: Iterable[Movie], signature: list) -> None:
+        """Replace the saved movies."""
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM library_movies")
+                connection.executemany(
+                    "INSERT OR REPLACE INTO library_movies VALUES (?, ?, ?)",
+                    (
+                        (movie.movie_id, movie.title, movie.year)
+                        for movie in movies
+                    ),
+                )
+                self._save(connection, "movie", signature)
+        finally:
+            connection.close()
+
+    def load_tv_shows(self) -> Optional[Tuple[Dict[int, TVShow], list]]:
+        """Load the saved TV shows, keyed by id, and their signature."""
+        connection = self._connect()
+        try:
+            signature = self._signature(connection, "tvshow")
+            if signature is None:
+                return None
+            shows = {}
+            for tvshow_id, title, year, seasons in connection.execute(
+                "SELECT tvshow_id, title, year, seasons FROM library_tv_shows",
+            ):
+                show = TVShow(title, year, tvshow_id)
+                show.seasons = tuple(
+                    TVShowSeason(season_number, episode_count)
+                    for season_number, episode_count in json.loads(seasons)
+                )
+                shows[tvshow_id] = show
+        finally:
+            connection.close()
+        self.logger.debug("Loaded %s TV shows from the snapshot", len(shows))
+        return shows, signature
+
+    def save_tv_shows(self, shows: Iterable[TVShow], signature: list) -> None:
+        """Replace the saved TV shows."""
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM library_tv_shows")
+                connection.executemany(
+                    "INSERT OR REPLACE INTO library_tv_shows "
+                    "VALUES (?, ?, ?, ?)",
+                    (
+                        (
+                            show.tvshow_id,
+                            show.title,
+                            show.year,
+                            json.dumps(
+                                [
+                                    [season.season_number, season.episode_count]
+                                    for season in show.seasons
+                                ],
+                            ),
+                        )
+                        for show in shows
+                    ),
+                )
+                self._save(connection, "tvshow", signature)
+        finally:
+            connection.close()
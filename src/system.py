@@ -0,0 +1,213 @@
+"""Background sampling of the health of the system running the bot."""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+WINDOWS = ((60, "1m"), (15 * 60, "15m"), (60 * 60, "1h"))
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+
+
+def read_cpu_times() -> Tuple[int, int]:
+    """Return the busy and total CPU time since boot, from /proc/stat."""
+    with open("/proc/stat", encoding="ascii") as stat:
+        times = [int(value) for value in stat.readline().split()[1:]]
+    idle = times[3] + (times[4] if len(times) > 4 else 0)  # noqa: PLR2004
+    return sum(times) - idle, sum(times)
+
+
+def read_load() -> float:
+    """Return the load average of the last minute, from /proc/loadavg."""
+    with open("/proc/loadavg", encoding="ascii") as loadavg:
+        return float(loadavg.read().split()[0])
+
+
+def read_memory_percent() -> float:
+    """Return the percentage of memory in use, from /proc/meminfo."""
+    fields = {}
+    with open("/proc/meminfo", encoding="ascii") as meminfo:
+        for line in meminfo:
+            name, value = line.split(":", 1)
+            fields[name] = int(value.split()[0])
+            if "MemTotal" in fields and "MemAvailable" in fields:
+                break
+    return 100.0 * (1 - fields["MemAvailable"] / fields["MemTotal"])
+
+
+def read_temperature() -> float:
+    """Return the SoC temperature in °C, from the first thermal zone."""
+    with open(THERMAL_ZONE, encoding="ascii") as zone:
+        return int(zone.read()) / 1000
+
+
+def read_disk_free(path: str) -> float:
+    """Return the free space of the filesystem of a path, in GB."""
+    stat = os.statvfs(path)
+    return stat.f_bavail * stat.f_frsize / 1e9
+
+
+class SystemSampler:
+    """Sample CPU, load, memory, temperature, disks and jobs of the bot.
+
+    The values are read from /proc and /sys every `sample_interval`
+    seconds in a worker thread, and kept in fixed-size ring buffers,
+    so a status is summarized from memory without reading anything.
+    A series crossing its alert threshold, on average over the last
+    minute, is reported once, and again when it is back to normal.
+    """
+
+    def __init__(
+        self,
+        system_config,
+        logger,
+        disks: Dict[str, str],
+        jobs: Callable[[], Dict[str, float]],
+        alert: Callable[[str], Awaitable[None]],
+    ):
+        """Initialize the SystemSampler class.
+
+        Args:
+            system_config: The system sampling configuration.
+            logger: Logger instance.
+            disks: Paths whose free space is sampled, by name.
+            jobs: Returns the number of jobs in flight, by name.
+            alert: Coroutine called with the text of an alert.
+        """
+        self.config = system_config
+        self.logger = logger
+        self.disks = disks
+        self.jobs = jobs
+        self.alert = alert
+        self.samples = max(
+            1,
+            int(self.config.history / self.config.sample_interval),
+        )
+        self.series: Dict[str, Deque[float]] = {}
+        self.alerting: set = set()
+        self._cpu: Optional[Tuple[int, int]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def thresholds(self) -> List[Tuple[str, float, bool]]:
+        """Get the alert thresholds: series, limit and if it is a minimum."""
+        thresholds = [
+            ("CPU %", self.config.alert_cpu, False),
+            ("Memory %", self.config.alert_memory, False),
+            ("Temperature °C", self.config.alert_temperature, False),
+        ]
+        thresholds.extend(
+            (f"Free GB {name}", self.config.alert_disk_free, True)
+            for name in self.disks
+        )
+        return [threshold for threshold in thresholds if threshold[1]]
+
+    def start(self) -> None:
+        """Start sampling, if not already started."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Take a sample at each interval, and check the thresholds."""
+        while True:
+            started = time.monotonic()
+            try:
+                values = await asyncio.to_thread(self._read)
+                values.update(self.jobs())
+                self._record(values)
+                await self._check_alerts()
+            except Exception as e:
+                self.logger.warning("Error sampling the system: %s", e)
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(0, self.config.sample_interval - elapsed))
+
+    def _read(self) -> Dict[str, float]:
+        """Read the system values. Runs in a worker thread."""
+        values = {}
+        readers = [
+            ("Load", read_load),
+            ("Memory %", read_memory_percent),
+            ("Temperature °C", read_temperature),
+        ]
+        readers.extend(
+            (f"Free GB {name}", lambda path=path: read_disk_free(path))
+            for name, path in self.disks.items()
+        )
+        try:
+            cpu = read_cpu_times()
+        except OSError:
+            cpu = None
+        if cpu is not None and self._cpu is not None and cpu[1] > self._cpu[1]:
+            values["CPU %"] = (
+                100.0 * (cpu[0] - self._cpu[0]) / (cpu[1] - self._cpu[1])
+            )
+        self._cpu = cpu
+        for name, read in readers:
+            try:
+                values[name] = read()
+            except (OSError, ValueError, KeyError):
+                # e.g. no thermal zone, or a media path not mounted
+                continue
+        return values
+
+    def _record(self, values: Dict[str, float]) -> None:
+        """Append a sample to the ring buffers."""
+        for name, value in values.items():
+            series = self.series.get(name)
+            if series is None:
+                series = self.series[name] = deque(maxlen=self.samples)
+            series.append(value)
+
+    def window(self, name: str, seconds: float) -> List[float]:
+        """Get the values of a series sampled in the last seconds."""
+        series = self.series.get(name, ())
+        count = max(1, int(seconds / self.config.sample_interval))
+        return list(series)[-count:]
+
+    async def _check_alerts(self) -> None:
+        """Alert on the series crossing their threshold, or back to normal."""
+        for name, limit, minimum in self.thresholds:
+            values = self.window(name, 60)
+            if not values:
+                continue
+            average = sum(values) / len(values)
+            crossed = average < limit if minimum else average > limit
+            if crossed and name not in self.alerting:
+                self.alerting.add(name)
+                await self.alert(
+                    f"⚠️ {name} is {average:.1f} "
+                    f"({'below' if minimum else 'above'} {limit:g})",
+                )
+            elif not crossed and name in self.alerting:
+                self.alerting.discard(name)
+                await self.alert(f"✅ {name} is back to {average:.1f}")
+
+    def summary(self) -> List[str]:
+        """Return the current value and min/avg/max of every series."""
+        lines = []
+        for name in sorted(self.series):
+            series = self.series[name]
+            if not series:
+                continue
+            parts = [f"{name}: {series[-1]:.1f}"]
+            for seconds, label in WINDOWS:
+                if seconds > self.config.history:
+                    break
+                values = self.window(name, seconds)
+                parts.append(
+                    f"{label} {min(values):.1f}/"
+                    f"{sum(values) / len(values):.1f}/{max(values):.1f}",
+                )
+            lines.append(" · ".join(parts))
+        return lines
@@ -0,0 +1,119 @@
+"""Persistent store of the tokens used as inline buttons callback data."""
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class CallbackTokenStore:
+    """SQLite backed registry mapping short tokens to callback payloads.
+
+    Telegram caps callback data to 64 bytes, so the buttons only carry
+    a short token, and the full payload (e.g. torrent id, path and name)
+    is kept here. Tokens expire after a TTL, the oldest ones are evicted
+    above a maximum number of entries, and they survive a bot restart.
+    The calls are blocking: the bot runs them in worker threads,
+    which share the connection one at a time.
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int, logger):
+        """Initialize the CallbackTokenStore class.
+
+        Args:
+            path: Path of the SQLite database file.
+            ttl: Seconds a token stays valid.
+            max_entries: Maximum number of tokens kept.
+            logger: Logger instance.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.logger = logger
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Get the database connection, creating the table if needed."""
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                self.path,
+                timeout=5,
+                check_same_thread=False,
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS callback_tokens ("
+                "token TEXT PRIMARY KEY, "
+                "payload TEXT NOT NULL, "
+                "expires REAL NOT NULL)",
+            )
+            self._connection.commit()
+        return self._connection
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def issue(self, payload: dict) -> str:
+        """Store a payload and return the token referencing it."""
+        token = secrets.token_urlsafe(8)
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO callback_tokens VALUES (?, ?, ?)",
+                (token, json.dumps(payload), time.time() + self.ttl),
+            )
+        self.evict()
+        return token
+
+    def get(self, token: str) -> Optional[dict]:
+        """Return the payload of a token, or None if unknown or expired."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT payload FROM callback_tokens "
+                "WHERE token = ? AND expires > ?",
+                (token, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, token: str, payload: dict) -> None:
+        """Replace the payload of a token, keeping its expiration."""
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE callback_tokens SET payload = ? WHERE token = ?",
+                (json.dumps(payload), token),
+            )
+
+    def delete(self, token: str) -> None:
+        """Forget a token once its choice has been handled."""
+        with self._lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM callback_tokens WHERE token = ?",
+                (token,),
+            )
+
+    def evict(self) -> None:
+        """Remove the expired tokens and the oldest ones above the limit."""
+        with self._lock, self.connection:
+            expired = self.connection.execute(
+                "DELETE FROM callback_tokens WHERE expires <= ?",
+                (time.time(),),
+            ).rowcount
+            overflow = self.connection.execute(
+                "DELETE FROM callback_tokens WHERE token IN ("
+                "SELECT token FROM callback_tokens "
+                "ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        if expired or overflow:
+            self.logger.debug(
+                "Evicted %s expired and %s overflowing callback tokens",
+                expired,
+                overflow,
+            )
@@ -0,0 +1,172 @@
+"""Notifications of the completed torrents."""
+
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.helpers import escape_markdown
+
+if TYPE_CHECKING:
+    from src.tokens import CallbackTokenStore
+
+TORRENT_ENV_VARS = ("TR_TORRENT_ID", "TR_TORRENT_DIR", "TR_TORRENT_NAME")
+BUTTON_LABEL_LENGTH = 24
+
+
+def torrent_path(t_dir: str, t_name: str) -> Optional[str]:
+    """Return the path of a torrent in its download directory.
+
+    Returns:
+        The path, or None if the name is not a single path component
+        (e.g. "../x" or "a/b"), or the path, with its links resolved,
+        is not in the directory.
+    """
+    if (
+        t_name in ("", ".", "..")
+        or os.sep in t_name
+        or (os.altsep and os.altsep in t_name)
+        or "\0" in t_name
+    ):
+        return None
+    directory = os.path.realpath(t_dir)
+    path = os.path.join(t_dir, t_name)
+    if os.path.dirname(os.path.realpath(path)) != directory:
+        return None
+    return path
+
+
+def torrent_complete_message(
+    t_id: Optional[str],
+    t_dir: Optional[str],
+    t_name: Optional[str],
+    tokens: "CallbackTokenStore",
+) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+    """Build the Torrent complete notification for the admin chat.
+
+    The notification includes inline keyboard to select the media type
+    (Movie or TV Show) for the completed torrent.
+    The torrent details are kept in the callback token store,
+    and the callback data for the buttons has following format:
+    "action|token"
+    Format is knows also by the bot, allowing it to process the user's choice
+    when the button is pressed.
+
+    In case of missing torrent details,
+    it is a simple notification without buttons.
+
+    Returns:
+        The Markdown text and the inline keyboard of the notification.
+    """
+    if not all([t_id, t_dir, t_name]):
+        return "📥 *Download Finished!*", None
+
+    token = tokens.issue({"id": t_id, "dir": t_dir, "name": t_name})
+    reply_markup = InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton(
+                    "🎬 Movie",
+                    callback_data=f"movies|{token}",
+                ),
+            ],
+            [
+                InlineKeyboardButton(
+                    "📺 TV",
+                    callback_data=f"tv_shows|{token}",
+                ),
+            ],
+        ],
+    )
+    return f"📥 *Download Finished*\n{escape_markdown(t_name)}", reply_markup
+
+
+def torrent_digest_message(
+    torrents: List[Dict[str, str]],
+    tokens: "CallbackTokenStore",
+) -> Tuple[str, InlineKeyboardMarkup]:
+    """Build a single notification for several completed torrents.
+
+    Each torrent gets its own Movie and TV buttons, referencing its own
+    token as in `torrent_complete_message`, and the last row applies
+    the same choice to every torrent not handled yet.
+    The token of the digest keeps the list of its torrents,
+    and the result of the torrents already handled.
+
+    Returns:
+        The Markdown text and the inline keyboard of the notification.
+    """
+    digest = tokens.issue({"items": [], "results": {}})
+    items = [
+        {
+            "token": tokens.issue(
+                {
+                    "id": torrent["id"],
+                    "dir": torrent["dir"],
+                    "name": torrent["name"],
+                    "digest": digest,
+                },
+            ),
+            "name": torrent["name"],
+        }
+        for torrent in torrents
+    ]
+    payload = {"items": items, "results": {}}
+    tokens.update(digest, payload)
+    return render_digest(digest, payload)
+
+
+def render_digest(
+    digest: str,
+    payload: dict,
+    lines: Optional[Dict[str, str]] = None,
+) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+    """Render the notification of several completed torrents.
+
+    Args:
+        digest: The token of the digest.
+        payload: The payload of the digest token.
+        lines: Optional status lines of torrents being handled, by token.
+
+    Returns:
+        The Markdown text and the inline keyboard of the notification,
+        without keyboard once every torrent has been handled.
+    """
+    lines = {**payload["results"], **(lines or {})}
+    text = [f"📥 *{len(payload['items'])} Downloads Finished*"]
+    buttons = []
+    for item in payload["items"]:
+        token, name = item["token"], item["name"]
+        text.append(escape_markdown(lines.get(token, f"• {name}")))
+        if token in payload["results"]:
+            continue
+        label = (
+            name
+            if len(name) <= BUTTON_LABEL_LENGTH
+            else f"{name[: BUTTON_LABEL_LENGTH - 1]}…"
+        )
+        buttons.append(
+            [
+                InlineKeyboardButton(
+                    f"🎬 {label}",
+                    callback_data=f"movies|{token}",
+                ),
+                InlineKeyboardButton(
+                    f"📺 {label}",
+                    callback_data=f"tv_shows|{token}",
+                ),
+            ],
+        )
+    if len(buttons) > 1:
+        buttons.append(
+            [
+                InlineKeyboardButton(
+                    "🎬 All Movies",
+                    callback_data=f"movies|{digest}",
+                ),
+                InlineKeyboardButton(
+                    "📺 All TV",
+                    callback_data=f"tv_shows|{digest}",
+                ),
+            ],
+        )
+    return "\n".join(text), InlineKeyboardMarkup(buttons) if buttons else None
@@ -0,0 +1,185 @@
+"""Background transfers of completed torrents to the Kodi media sources."""
+
+import asyncio
+import errno
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+from src.metrics import metrics
+
+
+class Transfer:
+    """State of a file or directory being moved, shared with the worker."""
+
+    def __init__(self, src: str, dest: str):
+        """Initialize the Transfer class with the source and destination."""
+        self.src = src
+        self.dest = dest
+        self.total = 0
+        self.copied = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the transfer started."""
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Average throughput of the transfer, in bytes per second."""
+        return self.copied / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def percent(self) -> float:
+        """Percentage of the transfer already copied."""
+        return 100.0 * self.copied / self.total if self.total else 100.0
+
+
+def tree_size(path: str) -> int:
+    """Return the size in bytes of a file, or of all files in a directory."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _dirs, files in os.walk(path)
+        for name in files
+    )
+
+
+class TransferManager:
+    """Move completed torrents in a bounded pool of worker threads.
+
+    Missing destination folders are created.
+    Moves within the same filesystem are a rename. Moves across filesystems
+    check the free space first, copy in large chunks to a temporary name,
+    rename it in place and finally remove the source,
+    while the progress is reported back on the event loop.
+    """
+
+    def __init__(self, transfer_config, logger):
+        """Initialize the TransferManager class with the given configuration."""
+        self.config = transfer_config
+        self.logger = logger
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Get the worker pool, creating it if it doesn't exist."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config.workers,
+                thread_name_prefix="transfer",
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        """Wait for the running transfers and stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def move(
+        self,
+        src: str,
+        dest: str,
+        progress: Optional[Callable[[Transfer], Awaitable[None]]] = None,
+    ) -> Transfer:
+        """Move `src` to `dest` without blocking the event loop.
+
+        Args:
+            src: Path of the file or directory to move.
+            dest: Destination path, including the final name.
+            progress: Optional coroutine called periodically with the
+                transfer state while a copy is running.
+
+        Returns:
+            The finished transfer.
+        """
+        loop = asyncio.get_running_loop()
+        transfer = Transfer(src, dest)
+        with metrics.timer("transfer"):
+            future = loop.run_in_executor(self.executor, self._move, transfer)
+            while True:
+                done, _pending = await asyncio.wait(
+                    [future],
+                    timeout=self.config.progress_interval,
+                )
+                if done:
+                    break
+                if progress is not None and transfer.total:
+                    try:
+                        await progress(transfer)
+                    except Exception as e:
+                        self.logger.warning("Error reporting progress: %s", e)
+            future.result()
+        metrics.inc("transfer_bytes_total", transfer.total)
+        self.logger.info(
+            "Moved %s to %s: %s bytes in %.1fs (%.1f MB/s)",
+            src,
+            dest,
+            transfer.total,
+            transfer.elapsed,
+            transfer.throughput / 1e6,
+        )
+        return transfer
+
+    def _move(self, transfer: Transfer) -> None:
+        """Move a file or directory. Runs in a worker thread."""
+        dest_dir = os.path.dirname(transfer.dest) or "."
+        os.makedirs(dest_dir, exist_ok=True)
+        if os.stat(transfer.src).st_dev == os.stat(dest_dir).st_dev:
+            transfer.total = transfer.copied = tree_size(transfer.src)
+            os.rename(transfer.src, transfer.dest)
+            return
+
+        transfer.total = tree_size(transfer.src)
+        free = shutil.disk_usage(dest_dir).free
+        if free < transfer.total:
+            raise OSError(
+                errno.ENOSPC,
+                f"Not enough free space in {dest_dir}: "
+                f"{transfer.total} bytes needed, {free} available",
+            )
+
+        partial = f"{transfer.dest}.part"
+        try:
+            if os.path.isdir(transfer.src):
+                for root, _dirs, files in os.walk(transfer.src):
+                    target = os.path.join(
+                        partial,
+                        os.path.relpath(root, transfer.src),
+                    )
+                    os.makedirs(target, exist_ok=True)
+                    for name in files:
+                        self._copy_file(
+                            os.path.join(root, name),
+                            os.path.join(target, name),
+                            transfer,
+                        )
+            else:
+                self._copy_file(transfer.src, partial, transfer)
+            os.rename(partial, transfer.dest)
+        except BaseException:
+            if os.path.isdir(partial):
+                shutil.rmtree(partial, ignore_errors=True)
+            elif os.path.exists(partial):
+                os.remove(partial)
+            raise
+
+        if os.path.isdir(transfer.src):
+            shutil.rmtree(transfer.src)
+        else:
+            os.remove(transfer.src)
+
+    def _copy_file(self, src: str, dest: str, transfer: Transfer) -> None:
+        """Copy a single file in large chunks, updating the transfer."""
+        buffer = bytearray(self.config.chunk_size)
+        view = memoryview(buffer)
+        with open(src, "rb") as reader, open(dest, "wb") as writer:
+            while read := reader.readinto(buffer):
+                writer.write(view[:read])
+                transfer.copied += read
+        shutil.copystat(src, dest)
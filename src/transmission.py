@@ -0,0 +1,138 @@
+"""Transmission client to interact with the Transmission torrent daemon."""
+
+import logging
+from typing import List, Optional
+
+import httpx
+
+from src.config import HealthConfig
+from src.health import CircuitBreaker
+
+SESSION_ID_HEADER = "X-Transmission-Session-Id"
+
+
+class TransmissionClient:
+    """Client to interact with Transmission using its RPC API.
+
+    Requests reuse a single keep-alive HTTP session.
+    The CSRF session id required by Transmission is cached
+    and only renegotiated when the daemon answers 409 Conflict.
+    While the daemon is unreachable, a circuit breaker makes the requests
+    fail fast.
+    """
+
+    def __init__(
+        self,
+        transmission_config,
+        logger,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """Initialize the Transmission class with the given configuration."""
+        self.config = transmission_config
+        self.logger = logger
+        self.breaker = breaker or CircuitBreaker(
+            "Transmission",
+            HealthConfig(),
+            logger,
+            (httpx.TransportError,),
+        )
+        self.url = (
+            f"http://{self.config.host}:{self.config.port}/transmission/rpc"
+        )
+        self.auth = (
+            (self.config.username, self.config.password)
+            if self.config.username and self.config.password
+            else None
+        )
+        self.session_id: Optional[str] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Get the HTTP session, creating it if it doesn't exist."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                auth=self.auth,
+                timeout=self.config.timeout,
+                limits=httpx.Limits(max_connections=1),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the HTTP session."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _query_transmission(self, method, arguments=None):
+        """Internal method to send an RPC request to Transmission."""
+        payload = {"method": method, "arguments": arguments or {}}
+        data = None
+        with self.breaker.reporting(method, logging.WARNING):
+            self.logger.debug(
+                "Sending request to Transmission: %s with arguments: %s",
+                method,
+                payload["arguments"],
+            )
+            with self.breaker.track():
+                response = await self._post(payload)
+                if response.status_code == httpx.codes.CONFLICT:
+                    self.session_id = response.headers.get(SESSION_ID_HEADER)
+                    response = await self._post(payload)
+                response.raise_for_status()
+                data = response.json()
+        if data is None:
+            return {}
+        if data.get("result") != "success":
+            self.logger.error(
+                "Transmission %s failed: %s",
+                method,
+                data.get("result"),
+            )
+        return data
+
+    async def _post(self, payload) -> httpx.Response:
+        """Post a payload with the cached session id."""
+        headers = (
+            {SESSION_ID_HEADER: self.session_id} if self.session_id else {}
+        )
+        return await self.client.post(self.url, json=payload, headers=headers)
+
+    async def ping(self) -> bool:
+        """Check if Transmission answers, e.g. for the health checks."""
+        response = await self._query_transmission(
+            "session-get",
+            {"fields": ["version"]},
+        )
+        return response.get("result") == "success"
+
+    async def get_torrents(
+        self,
+        ids: List[int],
+        fields: Optional[List[str]] = None,
+    ) -> List[dict]:
+        """Get the given fields of several torrents in a single request."""
+        response = await self._query_transmission(
+            "torrent-get",
+            {
+                "ids": ids,
+                "fields": fields or ["id", "name", "downloadDir", "status"],
+            },
+        )
+        return response.get("arguments", {}).get("torrents", [])
+
+    async def remove_torrents(
+        self,
+        ids: List[int],
+        delete_local_data: bool = False,
+    ) -> bool:
+        """Remove several torrents in a single request.
+
+        Returns:
+            True if Transmission removed the torrents.
+        """
+        response = await self._query_transmission(
+            "torrent-remove",
+            {"ids": ids, "delete-local-data": delete_local_data},
+        )
+        return response.get("result") == "success"
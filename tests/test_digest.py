@@ -0,0 +1,88 @@
+"""Tests of the aggregation of the torrent completions."""
+
+import asyncio
+import logging
+
+from src.digest import CompletionDigest, PendingCompletions
+
+LOGGER = logging.getLogger("test")
+
+
+def completion(index: int) -> dict:
+    """Return the variables of a torrent completion."""
+    return {
+        "TR_TORRENT_ID": str(index),
+        "TR_TORRENT_DIR": "/dl",
+        "TR_TORRENT_NAME": f"Torrent {index}",
+    }
+
+
+def test_completions_of_a_window_sent_together(tmp_path):
+    """The completions of a window are sent in a single call, then forgotten."""
+    store = PendingCompletions(str(tmp_path / "bot.db"), LOGGER)
+    sent = []
+
+    async def send(completions):
+        sent.append(completions)
+
+    async def scenario():
+        digest = CompletionDigest(0.05, send, LOGGER, store)
+        await digest.add(completion(1))
+        await digest.add(completion(2))
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    assert sent == [[completion(1), completion(2)]]
+    assert store.load() == []
+
+
+def test_completions_survive_a_crash(tmp_path):
+    """Completions saved but not sent are sent again after a restart."""
+    path = str(tmp_path / "bot.db")
+    sent = []
+
+    async def send(completions):
+        sent.append(completions)
+
+    async def crash():
+        digest = CompletionDigest(
+            60,
+            send,
+            LOGGER,
+            PendingCompletions(path, LOGGER),
+        )
+        await digest.add(completion(1))
+        # The bot dies within the window: nothing is sent.
+        digest._timer.cancel()
+
+    async def restart():
+        digest = CompletionDigest(
+            60,
+            send,
+            LOGGER,
+            PendingCompletions(path, LOGGER),
+        )
+        await digest.restore()
+        await digest.stop()
+
+    asyncio.run(crash())
+    assert sent == []
+    asyncio.run(restart())
+    assert sent == [[completion(1)]]
+    assert PendingCompletions(path, LOGGER).load() == []
+
+
+def test_failed_notification_kept(tmp_path):
+    """The completions of a failed notification are kept for the next start."""
+    store = PendingCompletions(str(tmp_path / "bot.db"), LOGGER)
+
+    async def send(_completions):
+        raise ConnectionError("Telegram unreachable")
+
+    async def scenario():
+        digest = CompletionDigest(60, send, LOGGER, store)
+        await digest.add(completion(1))
+        await digest.stop()
+
+    asyncio.run(scenario())
+    assert [variables for _id, variables in store.load()] == [completion(1)]
@@ -0,0 +1,115 @@
+"""Tests of the incremental parsing of the Kodi library responses."""
+
+import json
+
+import pytest
+
+from src.jsonstream import JSONArrayStream
+
+MOVIES = [
+    {"movieid": 1, "title": "Alien", "year": 1979},
+    {"movieid": 2, "title": 'The "Quoted" [Cut], {1}', "year": 2001},
+    {"movieid": 3, "title": 'Back\\slash \\" "movies": [', "year": 2010},
+]
+
+
+def response(movies) -> str:
+    """Return a GetMovies response with the given movies."""
+    return json.dumps(
+        {
+            "id": 1,
+            "jsonrpc": "2.0",
+            "result": {
+                "limits": {"start": 0, "end": len(movies), "total": 3},
+                "movies": movies,
+            },
+        },
+    )
+
+
+def parse(chunks) -> list:
+    """Feed the chunks to a parser and return the items, once closed."""
+    parser = JSONArrayStream("movies")
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    parser.close()
+    return items
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10000])
+def test_items_split_across_chunks(size):
+    """Items are the same, wherever the chunks are split."""
+    text = response(MOVIES)
+    chunks = [text[i : i + size] for i in range(0, len(text), size)]
+    assert parse(chunks) == MOVIES
+
+
+def test_compact_and_indented_responses():
+    """Items are parsed with or without whitespace between them."""
+    compact = json.dumps(
+        {"result": {"movies": MOVIES}},
+        separators=(",", ":"),
+    )
+    indented = json.dumps({"result": {"movies": MOVIES}}, indent=2)
+    assert parse([compact]) == MOVIES
+    assert parse([indented]) == MOVIES
+
+
+def test_escaped_key_in_a_string_is_not_the_array():
+    """A quoted key inside a string does not start the array."""
+    text = json.dumps(
+        {"id": '"movies": [{}]', "result": {"movies": MOVIES[:1]}},
+    )
+    assert parse([text]) == MOVIES[:1]
+
+
+def test_empty_library():
+    """A result without the array, as for an empty library, has no items."""
+    text = json.dumps({"id": 1, "result": {"limits": {"total": 0}}})
+    assert parse([text[:10], text[10:]]) == []
+    assert parse([response([])]) == []
+
+
+@pytest.mark.parametrize("size", [1, 5, 1000])
+def test_error_response(size):
+    """A JSON-RPC error raises instead of passing for an empty library."""
+    text = json.dumps(
+        {
+            "error": {"code": -32602, "message": "Invalid params."},
+            "id": 1,
+            "jsonrpc": "2.0",
+        },
+    )
+    with pytest.raises(ValueError, match="error"):
+        parse([text[i : i + size] for i in range(0, len(text), size)])
+
+
+def test_error_field_after_the_array_start():
+    """An "error" member of an item is not taken for an error response."""
+    text = json.dumps({"result": {"movies": [{"error": 1}, {"title": "x"}]}})
+    assert parse([text]) == [{"error": 1}, {"title": "x"}]
+
+
+@pytest.mark.parametrize("cut", [0.2, 0.5, 0.9])
+def test_truncated_response(cut):
+    """A response ending in the middle raises, wherever it is cut."""
+    text = response(MOVIES)
+    with pytest.raises(ValueError, match="Truncated"):
+        parse([text[: int(len(text) * cut)]])
+
+
+def test_truncated_before_the_array():
+    """A response ending before the array raises, instead of no items."""
+    with pytest.raises(ValueError, match="Truncated"):
+        parse(['{"id": 1, "jsonrpc": "2.0", "result": {"limi'])
+    with pytest.raises(ValueError, match="Truncated"):
+        parse([])
+
+
+def test_text_after_the_array_is_ignored():
+    """Nothing is parsed once the array is complete."""
+    parser = JSONArrayStream("movies")
+    assert parser.feed('{"result": {"movies": [1, 2]') == [1, 2]
+    assert parser.feed(', "other": [3]}}') == []
+    parser.close()
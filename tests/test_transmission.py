@@ -0,0 +1,141 @@
+"""Tests of the Transmission client against a local fake RPC server."""
+
+import asyncio
+import logging
+import types
+
+from benchmarks.fake_transmission import FakeTransmission
+from src.transmission import TransmissionClient
+
+TORRENTS = [
+    {"id": 1, "name": "Alien (1979)", "downloadDir": "/dl", "status": 6},
+    {"id": 2, "name": "Show.S01E02", "downloadDir": "/dl", "status": 6},
+    {"id": 3, "name": "Other", "downloadDir": "/dl", "status": 4},
+]
+
+
+def run(test, torrents=TORRENTS, stopped=False):
+    """Run a test coroutine with a fake server and a client of it."""
+
+    async def main():
+        fake = FakeTransmission([dict(torrent) for torrent in torrents])
+        port = await fake.start()
+        if stopped:
+            await fake.stop()
+        config = types.SimpleNamespace(
+            host="127.0.0.1",
+            port=port,
+            username=None,
+            password=None,
+            timeout=5,
+        )
+        client = TransmissionClient(config, logging.getLogger("test"))
+        try:
+            await test(fake, client)
+        finally:
+            await client.close()
+            await fake.stop()
+
+    asyncio.run(main())
+
+
+def test_session_id_negotiated_once():
+    """The session id is negotiated on the first request, then reused."""
+
+    async def test(fake, client):
+        assert await client.ping()
+        assert fake.conflicts == 1
+        assert client.session_id == fake.session_id
+        assert await client.ping()
+        assert fake.conflicts == 1
+
+    run(test)
+
+
+def test_session_id_renegotiated_on_conflict():
+    """A request with an outdated session id is sent again with the new one."""
+
+    async def test(fake, client):
+        assert await client.ping()
+        negotiated = fake.conflicts
+        fake.rotate_session()
+        torrents = await client.get_torrents([1], ["id", "name"])
+        assert torrents == [{"id": 1, "name": "Alien (1979)"}]
+        assert fake.conflicts == negotiated + 1
+        assert client.session_id == fake.session_id
+
+    run(test)
+
+
+def test_get_torrents_in_a_single_request():
+    """Several torrents are fetched in a single request."""
+
+    async def test(fake, client):
+        torrents = await client.get_torrents([1, 2])
+        assert [torrent["name"] for torrent in torrents] == [
+            "Alien (1979)",
+            "Show.S01E02",
+        ]
+        assert len(fake.requests) == 1
+
+    run(test)
+
+
+def test_batched_removal():
+    """Several torrents are removed in a single request, keeping the data."""
+
+    async def test(fake, client):
+        assert await client.remove_torrents([1, 2])
+        assert list(fake.torrents) == [3]
+        assert fake.requests == [
+            {
+                "method": "torrent-remove",
+                "arguments": {"ids": [1, 2], "delete-local-data": False},
+            },
+        ]
+
+    run(test)
+
+
+def test_rpc_failure():
+    """A result other than success is reported as a failed removal."""
+
+    async def test(fake, client):
+        fake.failure = "torrent not found"
+        assert not await client.remove_torrents([4])
+        assert await client.get_torrents([1]) == []
+
+    run(test)
+
+
+def test_http_error():
+    """An HTTP error is reported as a failure, not raised."""
+
+    async def test(fake, client):
+        fake.status = "500 Internal Server Error"
+        assert not await client.remove_torrents([1])
+        assert await client.get_torrents([1]) == []
+        assert not await client.ping()
+
+    run(test)
+
+
+def test_dropped_connection():
+    """A connection dropped by the daemon is reported as a failure."""
+
+    async def test(fake, client):
+        fake.drop = True
+        assert not await client.remove_torrents([1])
+        assert 1 in fake.torrents
+
+    run(test)
+
+
+def test_daemon_not_running():
+    """A daemon not listening is reported as a failure, not raised."""
+
+    async def test(_fake, client):
+        assert not await client.remove_torrents([1])
+        assert await client.get_torrents([1]) == []
+
+    run(test, stopped=True)
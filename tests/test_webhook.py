@@ -0,0 +1,141 @@
+"""Tests of the webhook mode, posting a recorded update locally."""
+
+import asyncio
+import json
+import os
+import socket
+
+import httpx
+import pytest
+from telegram.request import BaseRequest
+
+import main
+from src.config import Config
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "update.json")
+SECRET = "local-test-secret"
+CHAT_ID = 123456789
+BOT = {"id": 1, "is_bot": True, "first_name": "Bot", "username": "test_bot"}
+
+
+class FakeTelegram(BaseRequest):
+    """Bot API answering locally, recording the calls of the bot."""
+
+    def __init__(self):
+        """Initialize the FakeTelegram class."""
+        self.calls = []
+
+    @property
+    def read_timeout(self):
+        """Get the default read timeout."""
+        return None
+
+    async def initialize(self) -> None:
+        """Nothing to initialize."""
+
+    async def shutdown(self) -> None:
+        """Nothing to release."""
+
+    async def do_request(
+        self,
+        url,
+        method,  # noqa: ARG002
+        request_data=None,
+        **_timeouts,
+    ):
+        """Record a Bot API call and answer it."""
+        name = url.rsplit("/", 1)[-1]
+        parameters = request_data.parameters if request_data else {}
+        self.calls.append((name, parameters))
+        if name == "getMe":
+            result = BOT
+        elif name == "sendMessage":
+            result = {
+                "message_id": len(self.calls),
+                "date": 0,
+                "chat": {"id": parameters["chat_id"], "type": "private"},
+                "from": BOT,
+                "text": parameters["text"],
+            }
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+    def sent(self, name: str) -> list:
+        """Get the parameters of the calls of a Bot API method."""
+        return [
+            parameters for called, parameters in self.calls if called == name
+        ]
+
+
+def free_port() -> int:
+    """Get a free local TCP port."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Configure the webhook mode with a fixed secret, and no admin chat."""
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "0:test")
+    monkeypatch.delenv("TELEGRAM_ADMIN_CHAT_ID", raising=False)
+    monkeypatch.setenv("TELEGRAM_WEBHOOK_URL", "https://bot.example.org/")
+    monkeypatch.setenv("TELEGRAM_WEBHOOK_PORT", str(free_port()))
+    monkeypatch.setenv("TELEGRAM_WEBHOOK_SECRET", SECRET)
+    monkeypatch.setenv("TELEGRAM_BOT_DB", str(tmp_path / "bot.db"))
+    monkeypatch.setenv("TELEGRAM_BOT_SOCKET", str(tmp_path / "bot.sock"))
+    return Config()
+
+
+def test_recorded_update_through_the_webhook(config):
+    """A recorded update posted to the receiver is handled by the bot."""
+    telegram = FakeTelegram()
+    with open(FIXTURE, encoding="utf-8") as fixture:
+        update = fixture.read()
+    url = f"http://127.0.0.1:{config.webhook.port}/{config.webhook.path}"
+
+    async def scenario():
+        app = main.build_application(config, telegram)
+        async with app:
+            await app.post_init(app)
+            await app.updater.start_webhook(**main.webhook_options(config))
+            await app.start()
+            async with httpx.AsyncClient() as client:
+                headers = {"Content-Type": "application/json"}
+                rejected = await client.post(
+                    url,
+                    content=update,
+                    headers={
+                        **headers,
+                        "X-Telegram-Bot-Api-Secret-Token": "wrong",
+                    },
+                )
+                accepted = await client.post(
+                    url,
+                    content=update,
+                    headers={
+                        **headers,
+                        "X-Telegram-Bot-Api-Secret-Token": SECRET,
+                    },
+                )
+            for _ in range(100):
+                if telegram.sent("sendMessage"):
+                    break
+                await asyncio.sleep(0.05)
+            await app.updater.stop()
+            await app.stop()
+        await app.post_shutdown(app)
+        return rejected, accepted
+
+    rejected, accepted = asyncio.run(scenario())
+
+    assert rejected.status_code == httpx.codes.FORBIDDEN
+    assert accepted.status_code == httpx.codes.OK
+    (webhook,) = telegram.sent("setWebhook")
+    assert webhook["url"] == "https://bot.example.org/telegram"
+    assert webhook["secret_token"] == SECRET
+    assert webhook["allowed_updates"] == main.ALLOWED_UPDATES
+    (message,) = telegram.sent("sendMessage")
+    assert message["chat_id"] == CHAT_ID
+    assert message["text"] == "Hello Alice"